@@ -9,6 +9,8 @@ from typing import TypeVar, Callable, Any, Optional, List, Type
 from dataclasses import dataclass
 from functools import wraps
 
+from .retry_with_backoff import RetryOptions, retry_with_backoff
+
 T = TypeVar('T')
 
 logger = logging.getLogger(__name__)
@@ -25,6 +27,43 @@ class RetryConfig:
     retryable_exceptions: Optional[List[Type[Exception]]] = None
 
 
+def _to_retry_options(config: RetryConfig) -> RetryOptions:
+    """将RetryConfig转换为retry_with_backoff使用的RetryOptions"""
+    retryable = tuple(config.retryable_exceptions or ())
+    
+    def should_retry(error: Exception) -> bool:
+        # 未指定异常类型时所有异常都重试
+        if retryable and not isinstance(error, retryable):
+            logger.warning(f"Non-retryable exception: {error}")
+            return False
+        return True
+    
+    return RetryOptions(
+        max_attempts=config.max_attempts,
+        initial_delay_ms=int(config.base_delay * 1000),
+        max_delay_ms=int(config.max_delay * 1000),
+        should_retry=should_retry,
+        backoff_factor=config.exponential_base,
+        jitter=config.jitter
+    )
+
+
+async def _call_with_retry(
+    func: Callable[..., T],
+    is_coroutine: bool,
+    options: RetryOptions,
+    args: tuple,
+    kwargs: dict
+) -> T:
+    """统一交给retry_with_backoff执行"""
+    async def attempt() -> T:
+        if is_coroutine:
+            return await func(*args, **kwargs)
+        return func(*args, **kwargs)
+        
+    return await retry_with_backoff(attempt, options)
+
+
 async def with_retry(
     func: Callable[..., T],
     config: RetryConfig,
@@ -35,70 +74,30 @@ async def with_retry(
     异步重试装饰器
     支持指数退避、抖动、异常过滤等功能
     """
-    last_exception = None
-    
-    for attempt in range(config.max_attempts):
-        try:
-            if asyncio.iscoroutinefunction(func):
-                return await func(*args, **kwargs)
-            else:
-                return func(*args, **kwargs)
-                
-        except Exception as e:
-            last_exception = e
-            
-            # 检查是否为可重试的异常
-            if config.retryable_exceptions:
-                if not any(isinstance(e, exc_type) for exc_type in config.retryable_exceptions):
-                    logger.warning(f"Non-retryable exception: {e}")
-                    raise e
-                    
-            # 最后一次尝试，不再重试
-            if attempt == config.max_attempts - 1:
-                break
-                
-            # 计算延迟时间
-            delay = _calculate_delay(attempt, config)
-            
-            logger.warning(
-                f"Attempt {attempt + 1}/{config.max_attempts} failed: {e}. "
-                f"Retrying in {delay:.2f} seconds..."
-            )
-            
-            await asyncio.sleep(delay)
-            
-    # 所有重试都失败了
-    logger.error(f"All {config.max_attempts} attempts failed. Last error: {last_exception}")
-    raise last_exception
+    return await _call_with_retry(
+        func,
+        asyncio.iscoroutinefunction(func),
+        _to_retry_options(config),
+        args,
+        kwargs
+    )
 
 
 def retry(config: RetryConfig):
     """重试装饰器"""
+    options = _to_retry_options(config)
+    
     def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        # 装饰时确定一次是否为协程函数
+        is_coroutine = asyncio.iscoroutinefunction(func)
+        
         @wraps(func)
         async def wrapper(*args, **kwargs) -> T:
-            return await with_retry(func, config, *args, **kwargs)
+            return await _call_with_retry(func, is_coroutine, options, args, kwargs)
         return wrapper
     return decorator
 
 
-def _calculate_delay(attempt: int, config: RetryConfig) -> float:
-    """计算延迟时间（指数退避 + 抖动）"""
-    import random
-    
-    # 指数退避
-    delay = config.base_delay * (config.exponential_base ** attempt)
-    
-    # 限制最大延迟
-    delay = min(delay, config.max_delay)
-    
-    # 添加抖动
-    if config.jitter:
-        delay = delay * (0.5 + random.random() * 0.5)
-        
-    return delay
-
-
 # 预定义的重试配置
 DEFAULT_RETRY_CONFIG = RetryConfig(
     max_attempts=3,
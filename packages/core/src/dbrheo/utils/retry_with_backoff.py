@@ -6,8 +6,9 @@
 import asyncio
 import time
 import random
-from typing import TypeVar, Callable, Optional, Union, Awaitable, Dict, Any
-from functools import wraps
+from typing import TypeVar, Callable, Optional, Union, Awaitable, Dict, Any, Tuple
+from functools import wraps, lru_cache
+from email.utils import parsedate_to_datetime
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,15 +22,19 @@ class RetryOptions:
         self,
         max_attempts: int = 5,
         initial_delay_ms: int = 5000,  # 5秒
-        max_delay_ms: int = 30000,     # 30秒
+        max_delay_ms: int = 30000,     # 30秒，单次等待的上限（含抖动和Retry-After）
         should_retry: Optional[Callable[[Exception], bool]] = None,
-        on_persistent_429: Optional[Callable[[], Awaitable[None]]] = None
+        on_persistent_429: Optional[Callable[[], Awaitable[None]]] = None,
+        backoff_factor: float = 2.0,   # 每次重试的延迟倍数
+        jitter: bool = True
     ):
         self.max_attempts = max_attempts
         self.initial_delay_ms = initial_delay_ms
         self.max_delay_ms = max_delay_ms
         self.should_retry = should_retry or self._default_should_retry
         self.on_persistent_429 = on_persistent_429
+        self.backoff_factor = backoff_factor
+        self.jitter = jitter
         
     @staticmethod
     def _default_should_retry(error: Exception) -> bool:
@@ -53,6 +58,26 @@ class RetryOptions:
         return False
 
 
+@lru_cache(maxsize=128)
+def _parse_retry_after(header: str) -> Optional[Tuple[float, bool]]:
+    """
+    解析Retry-After头，结果按原始字符串缓存
+    返回 (值, 是否为绝对时间戳)：秒数形式返回相对秒数，HTTP日期返回时间戳
+    当前时间不参与缓存，延迟在调用方计算
+    """
+    # 尝试解析为秒数
+    try:
+        return float(int(header)), False
+    except ValueError:
+        pass
+        
+    # 尝试解析为HTTP日期
+    try:
+        return parsedate_to_datetime(header).timestamp(), True
+    except (TypeError, ValueError):
+        return None
+
+
 def get_retry_after_delay_ms(error: Exception) -> Optional[int]:
     """从错误中提取Retry-After延迟时间（毫秒）"""
     # 尝试从不同位置获取Retry-After头
@@ -66,24 +91,42 @@ def get_retry_after_delay_ms(error: Exception) -> Optional[int]:
     if not retry_after:
         return None
         
-    # 尝试解析为秒数
-    try:
-        seconds = int(retry_after)
-        return seconds * 1000
-    except ValueError:
-        pass
+    parsed = _parse_retry_after(str(retry_after))
+    if parsed is None:
+        return None
         
-    # 尝试解析为HTTP日期
-    try:
-        from datetime import datetime
-        from email.utils import parsedate_to_datetime
-        retry_date = parsedate_to_datetime(retry_after)
-        delay_ms = max(0, int((retry_date.timestamp() - time.time()) * 1000))
-        return delay_ms
-    except:
-        pass
+    value, is_timestamp = parsed
+    if is_timestamp:
+        return max(0, int((value - time.time()) * 1000))
+    return int(value * 1000)
+
+
+def _next_delay_ms(
+    error: Exception,
+    current_delay_ms: float,
+    options: RetryOptions
+) -> Tuple[float, float]:
+    """
+    计算本次等待时间和下一次的基础延迟
+    异步和同步版本共用，返回 (delay_ms, next_current_delay_ms)
+    delay_ms 不会超过 max_delay_ms：抖动后再截断，Retry-After 同样以 max_delay_ms 为上限
+    """
+    retry_after_delay = get_retry_after_delay_ms(error)
+    if retry_after_delay is not None:
+        delay_ms = min(options.max_delay_ms, retry_after_delay)
+        logger.info(f"Using Retry-After delay: {delay_ms}ms (requested {retry_after_delay}ms)")
+        return delay_ms, current_delay_ms
         
-    return None
+    # 使用指数退避 + 抖动
+    if options.jitter:
+        jitter = current_delay_ms * 0.3 * (random.random() * 2 - 1)
+    else:
+        jitter = 0
+    delay_ms = min(options.max_delay_ms, max(0, current_delay_ms + jitter))
+    logger.info(f"Using exponential backoff delay: {delay_ms}ms")
+    
+    # 准备下次延迟（指数增长）
+    return delay_ms, min(options.max_delay_ms, current_delay_ms * options.backoff_factor)
 
 
 async def retry_with_backoff(
@@ -147,18 +190,7 @@ async def retry_with_backoff(
                 logger.error(f"Error on attempt {attempt + 1}/{options.max_attempts}: {error}")
                 
             # 计算延迟时间
-            retry_after_delay = get_retry_after_delay_ms(error)
-            if retry_after_delay is not None:
-                delay_ms = retry_after_delay
-                logger.info(f"Using Retry-After delay: {delay_ms}ms")
-            else:
-                # 使用指数退避 + 抖动
-                jitter = current_delay_ms * 0.3 * (random.random() * 2 - 1)
-                delay_ms = max(0, current_delay_ms + jitter)
-                logger.info(f"Using exponential backoff delay: {delay_ms}ms")
-                
-                # 准备下次延迟（指数增长）
-                current_delay_ms = min(options.max_delay_ms, current_delay_ms * 2)
+            delay_ms, current_delay_ms = _next_delay_ms(error, current_delay_ms, options)
                 
             # 等待
             await asyncio.sleep(delay_ms / 1000)
@@ -181,16 +213,17 @@ def retry_decorator(
         async def fetch_data():
             return await api_call()
     """
+    # 选项在定义时构建一次，所有调用共享
+    options = RetryOptions(
+        max_attempts=max_attempts,
+        initial_delay_ms=initial_delay_ms,
+        max_delay_ms=max_delay_ms,
+        should_retry=should_retry
+    )
+    
     def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
         @wraps(func)
         async def wrapper(*args, **kwargs) -> T:
-            options = RetryOptions(
-                max_attempts=max_attempts,
-                initial_delay_ms=initial_delay_ms,
-                max_delay_ms=max_delay_ms,
-                should_retry=should_retry
-            )
-            
             async def wrapped_func():
                 return await func(*args, **kwargs)
                 
@@ -237,15 +270,7 @@ def retry_with_backoff_sync(
             else:
                 logger.error(f"Error on attempt {attempt + 1}/{options.max_attempts}: {error}")
                 
-            retry_after_delay = get_retry_after_delay_ms(error)
-            if retry_after_delay is not None:
-                delay_ms = retry_after_delay
-                logger.info(f"Using Retry-After delay: {delay_ms}ms")
-            else:
-                jitter = current_delay_ms * 0.3 * (random.random() * 2 - 1)
-                delay_ms = max(0, current_delay_ms + jitter)
-                logger.info(f"Using exponential backoff delay: {delay_ms}ms")
-                current_delay_ms = min(options.max_delay_ms, current_delay_ms * 2)
+            delay_ms, current_delay_ms = _next_delay_ms(error, current_delay_ms, options)
                 
             time.sleep(delay_ms / 1000)
             
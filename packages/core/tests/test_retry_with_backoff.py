@@ -0,0 +1,69 @@
+"""
+retry_with_backoff 的单元测试：Retry-After解析与延迟上限
+"""
+
+import time
+from email.utils import formatdate
+from types import SimpleNamespace
+
+import pytest
+
+from dbrheo.utils.retry_with_backoff import (
+    RetryOptions,
+    _next_delay_ms,
+    _parse_retry_after,
+    get_retry_after_delay_ms,
+)
+
+
+def _error_with_retry_after(value):
+    error = Exception("429 Too Many Requests")
+    error.response = SimpleNamespace(headers={"Retry-After": value})
+    return error
+
+
+class TestParseRetryAfter:
+    def test_seconds(self):
+        assert _parse_retry_after("120") == (120.0, False)
+
+    def test_http_date(self):
+        value, is_timestamp = _parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT")
+        assert is_timestamp
+        assert value == 1445412480.0
+
+    @pytest.mark.parametrize("header", ["", "soon", "1.5"])
+    def test_invalid(self, header):
+        assert _parse_retry_after(header) is None
+
+    def test_http_date_delay_is_relative_to_now(self):
+        header = formatdate(time.time() + 60, usegmt=True)
+        delay_ms = get_retry_after_delay_ms(_error_with_retry_after(header))
+        assert 55000 <= delay_ms <= 60000
+
+    def test_past_http_date_is_zero(self):
+        header = formatdate(time.time() - 60, usegmt=True)
+        assert get_retry_after_delay_ms(_error_with_retry_after(header)) == 0
+
+
+class TestNextDelay:
+    def test_jitter_never_exceeds_max_delay(self):
+        options = RetryOptions(max_delay_ms=1000, jitter=True)
+        for _ in range(200):
+            delay_ms, next_delay_ms = _next_delay_ms(Exception("500"), 1000, options)
+            assert 0 <= delay_ms <= 1000
+            assert next_delay_ms == 1000
+
+    def test_retry_after_is_capped(self):
+        options = RetryOptions(max_delay_ms=1000)
+        delay_ms, next_delay_ms = _next_delay_ms(_error_with_retry_after("120"), 500, options)
+        assert delay_ms == 1000
+        assert next_delay_ms == 500
+
+    def test_retry_after_below_cap_is_used(self):
+        options = RetryOptions(max_delay_ms=10000)
+        delay_ms, _ = _next_delay_ms(_error_with_retry_after("2"), 500, options)
+        assert delay_ms == 2000
+
+    def test_backoff_without_jitter(self):
+        options = RetryOptions(max_delay_ms=10000, jitter=False, backoff_factor=2.0)
+        assert _next_delay_ms(Exception("500"), 3000, options) == (3000, 6000)
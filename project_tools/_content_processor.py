@@ -3,11 +3,358 @@ Flexible content processor for various file types
 Extensible and minimal intrusion design
 """
 
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional, Tuple, Callable
+import asyncio
+import atexit
+import codecs
+import io
+import json
+import logging
 import mimetypes
+import multiprocessing
 import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import cache, lru_cache
 from pathlib import Path
 
+import aiofiles
+
+# Optional accelerated parsers / encoding detection
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    from charset_normalizer import from_bytes
+except ImportError:
+    from_bytes = None
+try:
+    from lxml import etree as xml_etree
+    _LXML = True
+except ImportError:
+    _LXML = False
+    try:
+        from defusedxml import ElementTree as xml_etree
+    except ImportError:
+        # The stdlib parser isn't hardened against entity expansion
+        xml_etree = None
+try:
+    import puremagic
+except ImportError:
+    puremagic = None
+
+logger = logging.getLogger(__name__)
+
+# Structure extraction patterns
+_HEADER_RE = re.compile(r'^#{1,6}\s+(.+)$', re.MULTILINE)
+_PY_FUNC_RE = re.compile(r'^def\s+(\w+)', re.MULTILINE)
+_PY_CLASS_RE = re.compile(r'^class\s+(\w+)', re.MULTILINE)
+
+
+@lru_cache(maxsize=512)
+def _cached_guess(extension: str) -> Optional[str]:
+    """Guess mime type from a file extension (cached per suffix)"""
+    return mimetypes.types_map.get(extension) or mimetypes.guess_type("x" + extension)[0]
+
+
+# Leading-byte signatures used when puremagic isn't installed
+_MAGIC_SIGNATURES = (
+    (b"%PDF-", "application/pdf"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"BM", "image/bmp"),
+    (b"PK\x03\x04", "application/zip"),
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "application/x-ole-storage"),
+)
+_SNIFF_BYTES = 4096
+
+
+def _detect_mime(path: Path, st: os.stat_result) -> Optional[str]:
+    """Detect mime type from file content, cached by path, mtime and size"""
+    return _sniff_mime(str(path), st.st_mtime, st.st_size)
+
+
+@lru_cache(maxsize=1024)
+def _sniff_mime(file_path: str, mtime: float, size: int) -> Optional[str]:
+    """Sniff the first bytes of a file (mtime/size are part of the cache key)"""
+    try:
+        with open(file_path, "rb") as f:
+            head = f.read(_SNIFF_BYTES)
+    except OSError:
+        return None
+    if not head:
+        return None
+    
+    if puremagic is not None:
+        try:
+            mime_type = puremagic.from_string(head, mime=True)
+            if mime_type:
+                return mime_type
+        except puremagic.PureError:
+            pass
+    
+    for signature, mime_type in _MAGIC_SIGNATURES:
+        if head.startswith(signature):
+            return mime_type
+    
+    # NUL-free UTF-8 (possibly cut mid-character) is treated as plain text
+    if b"\x00" not in head:
+        try:
+            codecs.getincrementaldecoder("utf-8")().decode(head)
+            return "text/plain"
+        except UnicodeDecodeError:
+            pass
+    return None
+
+
+# Process pool shared by CPU-bound extraction. Created on first use, it
+# lives for the rest of the process and is shut down at interpreter exit
+_POOL_MAX_WORKERS = min(8, os.cpu_count() or 1)
+_PROC_POOL: Optional[ProcessPoolExecutor] = None
+
+# Set inside pool workers so they don't spawn nested pools
+_IN_WORKER = False
+
+# Large PDFs are split into page ranges extracted in worker processes
+_PDF_PARALLEL_MIN_PAGES = 64
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """
+    Get or create the shared extraction process pool
+    Workers are spawned, not forked: the parent runs an event loop, worker
+    threads and possibly torch, none of which survive a fork safely
+    """
+    global _PROC_POOL
+    if _PROC_POOL is None:
+        _PROC_POOL = ProcessPoolExecutor(
+            max_workers=_POOL_MAX_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        atexit.register(_PROC_POOL.shutdown, wait=False, cancel_futures=True)
+    return _PROC_POOL
+
+
+def _extract_pdf_pages(file_path: str, start: int, stop: int) -> str:
+    """Extract a page range with its own PyMuPDF document handle"""
+    import fitz  # PyMuPDF
+    with fitz.open(file_path) as doc:
+        return "\n".join(doc[i].get_text("text") for i in range(start, stop))
+
+
+def _extract_pdf_text(file_path: str, parallel: bool = True) -> Tuple[str, int]:
+    """
+    Extract PDF text synchronously
+    Prefers PyMuPDF (much faster), falls back to PyPDF2
+    """
+    try:
+        import fitz  # PyMuPDF
+        with fitz.open(file_path) as doc:
+            page_count = doc.page_count
+            if not parallel or page_count < _PDF_PARALLEL_MIN_PAGES or _POOL_MAX_WORKERS < 2:
+                text = "\n".join(page.get_text("text") for page in doc)
+                return text, page_count
+        
+        # PyMuPDF documents can't be shared across threads, so each worker
+        # process opens the file and extracts one contiguous page range
+        step = -(-page_count // _POOL_MAX_WORKERS)
+        starts = range(0, page_count, step)
+        parts = _get_process_pool().map(
+            _extract_pdf_pages,
+            [file_path] * len(starts),
+            starts,
+            [min(start + step, page_count) for start in starts]
+        )
+        return "\n".join(parts), page_count
+    except ImportError:
+        import PyPDF2
+        with open(file_path, "rb") as f:
+            reader = PyPDF2.PdfReader(f)
+            text = "".join(page.extract_text() + "\n" for page in reader.pages)
+            return text, len(reader.pages)
+
+
+def _decode_detected(raw: bytes) -> Tuple[str, str]:
+    """
+    Decode bytes whose declared encoding failed
+    Uses charset-normalizer when available, latin-1 as last resort
+    """
+    if from_bytes is not None:
+        best = from_bytes(raw).best()
+        if best is not None:
+            return str(best), best.encoding
+    return raw.decode("latin-1"), "latin-1"
+
+
+def _parse_xml(raw: bytes):
+    """
+    Parse untrusted XML without expanding entities or touching the network
+    Uses lxml with a locked-down parser, otherwise defusedxml
+    """
+    if _LXML:
+        # A fresh parser per call: lxml parsers aren't safe to share across threads
+        parser = xml_etree.XMLParser(resolve_entities=False, no_network=True, huge_tree=False)
+        return xml_etree.fromstring(raw, parser)
+    return xml_etree.fromstring(raw)
+
+
+def _normalize_structured(raw: bytes, content: str, extension: Optional[str]) -> Optional[str]:
+    """
+    Compact JSON and reduce XML to its text content (tags and attributes are dropped)
+    Returns None when the file isn't JSON/XML, doesn't parse, or no safe XML parser is installed
+    """
+    try:
+        if extension == ".json":
+            if orjson is not None:
+                return orjson.dumps(orjson.loads(content)).decode()
+            return json.dumps(json.loads(content), ensure_ascii=False, separators=(",", ":"))
+        if extension == ".xml" and xml_etree is not None:
+            root = _parse_xml(raw)
+            return " ".join(t.strip() for t in root.itertext() if t.strip())
+    except (ValueError, SyntaxError):
+        return None
+    return None
+
+
+def _iter_entries(root: str) -> Iterator[os.DirEntry]:
+    """
+    Yield regular files under root using os.scandir
+    Symlinks are not followed, DirEntry carries the cached stat
+    """
+    stack = [root]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry
+        except OSError as e:
+            logger.warning("Skipping unreadable directory: %s", e)
+
+
+class _TextBuffer:
+    """
+    Separator-joined text built incrementally in one StringIO
+    Same result as sep.join(parts) without keeping the parts list alive
+    """
+    
+    def __init__(self, sep: str = "\n"):
+        self._buf = io.StringIO()
+        self._sep = sep
+        self._empty = True
+    
+    def add(self, text: str, sep: Optional[str] = None):
+        """Append text, preceded by the separator unless it's the first part"""
+        if not self._empty:
+            self._buf.write(self._sep if sep is None else sep)
+        self._buf.write(text)
+        self._empty = False
+    
+    def getvalue(self) -> str:
+        return self._buf.getvalue()
+
+
+def _extract_excel_text(file_path: str) -> Tuple[str, int]:
+    """
+    Extract workbook text synchronously as tab-separated rows
+    Streams rows with openpyxl read-only mode, falls back to pandas
+    (also used for legacy .xls which openpyxl can't read)
+    """
+    try:
+        if file_path.lower().endswith(".xls"):
+            raise ImportError("openpyxl does not support .xls")
+        from openpyxl import load_workbook
+    except ImportError:
+        import pandas as pd
+        dfs = pd.read_excel(file_path, sheet_name=None)
+        text = []
+        for sheet_name, df in dfs.items():
+            text.append(f"Sheet: {sheet_name}")
+            text.append(df.to_csv(sep="\t", index=False))
+        return "\n\n".join(text), len(dfs)
+    
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        text = _TextBuffer()
+        for ws in wb.worksheets:
+            text.add(f"Sheet: {ws.title}", sep="\n\n")
+            for row in ws.iter_rows(values_only=True):
+                text.add("\t".join("" if v is None else str(v) for v in row))
+        return text.getvalue(), len(wb.worksheets)
+    finally:
+        wb.close()
+
+
+def _extract_docx_text(file_path: str) -> Tuple[str, int, int]:
+    """
+    Extract DOCX paragraphs and table cells synchronously with python-docx
+    Returns the text plus paragraph and table counts
+    """
+    from docx import Document
+    doc = Document(file_path)
+    
+    # Extract all paragraphs
+    text = _TextBuffer()
+    for paragraph in doc.paragraphs:
+        if paragraph.text.strip():
+            text.add(paragraph.text)
+    
+    # Extract text from tables
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                if cell.text.strip():
+                    text.add(cell.text)
+    
+    return text.getvalue(), len(doc.paragraphs), len(doc.tables)
+
+
+def _extract_docx_xml_text(file_path: str) -> str:
+    """Extract DOCX text synchronously from word/document.xml (no python-docx)"""
+    import zipfile
+    import xml.etree.ElementTree as ET
+    
+    text = _TextBuffer(sep=" ")
+    with zipfile.ZipFile(file_path, 'r') as z:
+        # Read main document
+        with z.open('word/document.xml') as f:
+            # Stream the XML so large documents aren't held in memory
+            text_tag = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}t'
+            for _, elem in ET.iterparse(f, events=('end',)):
+                if elem.tag == text_tag and elem.text:
+                    text.add(elem.text)
+                elem.clear()
+    
+    return text.getvalue()
+
+
+def _extract_pptx_text(file_path: str) -> Tuple[str, int]:
+    """Extract slide text synchronously with python-pptx"""
+    from pptx import Presentation
+    prs = Presentation(file_path)
+    
+    text = _TextBuffer()
+    for i, slide in enumerate(prs.slides, 1):
+        text.add(f"Slide {i}:")
+        for shape in slide.shapes:
+            if hasattr(shape, "text") and shape.text:
+                text.add(shape.text)
+    
+    return text.getvalue(), len(prs.slides)
+
+
+def _ocr_image(file_path: str) -> str:
+    """Run Tesseract OCR on an image synchronously"""
+    import pytesseract
+    from PIL import Image
+    with Image.open(file_path) as img:
+        return pytesseract.image_to_string(img)
+
 
 class ContentProcessor:
     """
@@ -18,6 +365,12 @@ class ContentProcessor:
     def __init__(self):
         # Register processors by mime type patterns
         self.processors = {}
+        # Lookup tables derived from registrations
+        self._ext_map: Dict[str, Callable] = {}
+        self._mime_exact: Dict[str, Callable] = {}
+        self._mime_prefixes: Dict[str, Callable] = {}
+        # Resolved (mime_type, extension) -> processor, cleared on registration
+        self._resolved: Dict[Tuple[Optional[str], str], Callable] = {}
         self._register_default_processors()
     
     def _register_default_processors(self):
@@ -79,9 +432,15 @@ class ContentProcessor:
         if patterns:
             for pattern in patterns:
                 self.processors[pattern] = processor
+                if pattern.endswith("/*"):
+                    self._mime_prefixes[pattern[:-2]] = processor
+                else:
+                    self._mime_exact[pattern] = processor
         if extensions:
             for ext in extensions:
                 self.processors[f"ext:{ext}"] = processor
+                self._ext_map[ext] = processor
+        self._resolved.clear()
     
     async def process_content(
         self,
@@ -109,24 +468,98 @@ class ContentProcessor:
             # Unknown type, return as-is
             return str(source), {"type": "unknown"}
     
-    async def _process_file(self, file_path: str, **kwargs) -> Tuple[str, Dict[str, Any]]:
+    async def process_many(
+        self,
+        sources: List[str],
+        max_concurrency: int = 8,
+        stats: Optional[List[os.stat_result]] = None,
+        **kwargs
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Process multiple files concurrently
+        I/O-bound files run on the event loop, CPU-bound formats (PDF,
+        Office documents) run in the shared process pool
+        stats: optional stat results matching sources, saves a stat per file
+        Returns: list of (processed_text, metadata) in input order
+        """
+        sem = asyncio.Semaphore(max_concurrency)
+        loop = asyncio.get_running_loop()
+        if stats is None:
+            stats = [None] * len(sources)
+        
+        async def process_one(source: str, st: Optional[os.stat_result]) -> Tuple[str, Dict[str, Any]]:
+            async with sem:
+                if self._is_cpu_bound(source):
+                    return await loop.run_in_executor(
+                        _get_process_pool(), _extract_sync, source, kwargs
+                    )
+                return await self._process_file(source, st=st, **kwargs)
+        
+        return await asyncio.gather(*(process_one(source, st) for source, st in zip(sources, stats)))
+    
+    async def walk_and_process(
+        self,
+        root: str,
+        batch_size: int = 64,
+        max_concurrency: int = 8,
+        **kwargs
+    ) -> AsyncIterator[List[Tuple[str, Dict[str, Any]]]]:
+        """
+        Walk a directory tree and process its files in batches
+        Uses os.scandir so each file is stat'ed once
+        Yields: lists of (processed_text, metadata) per batch
+        """
+        sources, stats = [], []
+        for entry in _iter_entries(root):
+            sources.append(entry.path)
+            stats.append(entry.stat(follow_symlinks=False))
+            if len(sources) >= batch_size:
+                yield await self.process_many(sources, max_concurrency, stats, **kwargs)
+                sources, stats = [], []
+        if sources:
+            yield await self.process_many(sources, max_concurrency, stats, **kwargs)
+    
+    def _is_cpu_bound(self, file_path: str) -> bool:
+        """Check whether a file resolves to a built-in CPU-bound processor"""
+        extension = Path(file_path).suffix.lower()
+        mime_type = None if extension in self._ext_map else _cached_guess(extension)
+        processor = self._find_processor(mime_type, extension)
+        return getattr(processor, "__func__", None) in _CPU_BOUND_PROCESSORS
+    
+    async def _process_file(
+        self,
+        file_path: str,
+        st: Optional[os.stat_result] = None,
+        **kwargs
+    ) -> Tuple[str, Dict[str, Any]]:
         """Process file based on type detection"""
         path = Path(file_path)
         
-        if not path.exists():
-            raise FileNotFoundError(f"File not found: {file_path}")
+        # One stat call covers the existence check, size and mtime
+        # (skipped when the caller already has it, e.g. from scandir)
+        if st is None:
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                raise FileNotFoundError(f"File not found: {file_path}") from None
         
-        # Detect mime type
-        mime_type, _ = mimetypes.guess_type(file_path)
+        # Sniff content only when the extension alone doesn't pick a processor;
+        # known extensions still report their guessed mime type
         extension = path.suffix.lower()
+        if extension in self._ext_map:
+            mime_type = _cached_guess(extension)
+        else:
+            # Unknown extensions fall back to content sniffing, which reads
+            # the file, so it runs off the event loop
+            mime_type = _cached_guess(extension) or await asyncio.to_thread(_detect_mime, path, st)
         
         # Build metadata
         metadata = {
             "source": file_path,
             "mime_type": mime_type,
             "extension": extension,
-            "size": path.stat().st_size,
-            "modified": path.stat().st_mtime
+            "size": st.st_size,
+            "modified": st.st_mtime
         }
         
         # Find appropriate processor
@@ -139,23 +572,33 @@ class ContentProcessor:
         except Exception as e:
             # Fallback to basic text reading
             print(f"Processor failed for {file_path}: {e}, using fallback")
-            return await self._fallback_processor(file_path, metadata)
+            return await self._fallback_processor(file_path, metadata), metadata
     
     def _find_processor(self, mime_type: str, extension: str):
         """Find appropriate processor for file type"""
+        key = (mime_type, extension)
+        processor = self._resolved.get(key)
+        if processor is None:
+            processor = self._resolve_processor(mime_type, extension)
+            self._resolved[key] = processor
+        return processor
+    
+    def _resolve_processor(self, mime_type: str, extension: str):
+        """Resolve processor from the lookup tables"""
         # Check extension first (more specific)
-        ext_key = f"ext:{extension}"
-        if ext_key in self.processors:
-            return self.processors[ext_key]
+        processor = self._ext_map.get(extension)
+        if processor is not None:
+            return processor
         
-        # Check exact mime type
-        if mime_type and mime_type in self.processors:
-            return self.processors[mime_type]
-        
-        # Check mime type patterns
         if mime_type:
-            for pattern, processor in self.processors.items():
-                if pattern.endswith("/*") and mime_type.startswith(pattern[:-2]):
+            # Check exact mime type
+            processor = self._mime_exact.get(mime_type)
+            if processor is not None:
+                return processor
+            
+            # Check mime type patterns
+            for prefix, processor in self._mime_prefixes.items():
+                if mime_type.startswith(prefix):
                     return processor
         
         # Default processor
@@ -164,29 +607,34 @@ class ContentProcessor:
     async def _process_text(self, file_path: str, metadata: Dict, **kwargs) -> str:
         """Process plain text files"""
         encoding = kwargs.get("encoding", "utf-8")
+        async with aiofiles.open(file_path, "rb") as f:
+            raw = await f.read()
         try:
-            with open(file_path, "r", encoding=encoding) as f:
-                content = f.read()
+            content = raw.decode(encoding)
             metadata["encoding"] = encoding
-            return content
         except UnicodeDecodeError:
-            # Try with different encoding
-            with open(file_path, "r", encoding="latin-1") as f:
-                content = f.read()
-            metadata["encoding"] = "latin-1"
-            return content
+            # Detect the real encoding from the bytes already read
+            content, metadata["encoding"] = _decode_detected(raw)
+        
+        # Opt-in: compact structured formats to cut tokens sent for embedding
+        if kwargs.get("normalize_structured", False):
+            normalized = _normalize_structured(raw, content, metadata.get("extension"))
+            if normalized is not None:
+                metadata["normalized"] = True
+                return normalized
+        
+        return content
     
     async def _process_markdown(self, file_path: str, metadata: Dict, **kwargs) -> str:
         """Process markdown files"""
         content = await self._process_text(file_path, metadata, **kwargs)
         metadata["type"] = "markdown"
         
-        # Optional: extract structure
-        if kwargs.get("extract_structure", False):
-            import re
-            headers = re.findall(r'^#{1,6}\s+(.+)$', content, re.MULTILINE)
-            metadata["headers"] = headers
+        # Structure extraction is opt-in; skip all regex work otherwise
+        if not kwargs.get("extract_structure"):
+            return content
         
+        metadata["headers"] = _HEADER_RE.findall(content)
         return content
     
     async def _process_code(self, file_path: str, metadata: Dict, **kwargs) -> str:
@@ -194,81 +642,46 @@ class ContentProcessor:
         content = await self._process_text(file_path, metadata, **kwargs)
         metadata["type"] = "code"
         
-        # Optional: extract structure
-        if kwargs.get("extract_structure", False):
-            import re
-            # Extract function/class definitions (basic)
-            if metadata["extension"] in [".py"]:
-                functions = re.findall(r'^def\s+(\w+)', content, re.MULTILINE)
-                classes = re.findall(r'^class\s+(\w+)', content, re.MULTILINE)
-                metadata["functions"] = functions
-                metadata["classes"] = classes
+        # Structure extraction is opt-in; skip all regex work otherwise
+        if not kwargs.get("extract_structure") or metadata["extension"] != ".py":
+            return content
         
+        # Extract function/class definitions (basic)
+        metadata["functions"] = _PY_FUNC_RE.findall(content)
+        metadata["classes"] = _PY_CLASS_RE.findall(content)
         return content
     
     async def _process_pdf(self, file_path: str, metadata: Dict, **kwargs) -> str:
         """Process PDF files if library available"""
         try:
-            import PyPDF2
-            with open(file_path, "rb") as f:
-                reader = PyPDF2.PdfReader(f)
-                text = ""
-                for page in reader.pages:
-                    text += page.extract_text() + "\n"
-            metadata["type"] = "pdf"
-            metadata["pages"] = len(reader.pages)
-            return text
+            # Extraction is CPU-bound, keep it off the event loop
+            text, pages = await asyncio.to_thread(
+                _extract_pdf_text, file_path, not _IN_WORKER
+            )
         except ImportError:
             # Library not available, try basic extraction
-            print("PyPDF2 not installed, using basic text extraction")
+            print("PyMuPDF/PyPDF2 not installed, using basic text extraction")
             return await self._fallback_processor(file_path, metadata)
+        
+        metadata["type"] = "pdf"
+        metadata["pages"] = pages
+        return text
     
     async def _process_docx(self, file_path: str, metadata: Dict, **kwargs) -> str:
         """Process Word DOCX files"""
         metadata["type"] = "docx"
         
         try:
-            # Try python-docx first
-            from docx import Document
-            doc = Document(file_path)
-            
-            # Extract all paragraphs
-            text = []
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    text.append(paragraph.text)
-            
-            # Extract text from tables
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        if cell.text.strip():
-                            text.append(cell.text)
-            
-            metadata["paragraphs"] = len(doc.paragraphs)
-            metadata["tables"] = len(doc.tables)
-            return "\n".join(text)
+            # Try python-docx first; parsing runs off the event loop
+            text, paragraphs, tables = await asyncio.to_thread(_extract_docx_text, file_path)
+            metadata["paragraphs"] = paragraphs
+            metadata["tables"] = tables
+            return text
             
         except ImportError:
             # Try alternative method with zipfile
             try:
-                import zipfile
-                import xml.etree.ElementTree as ET
-                
-                text = []
-                with zipfile.ZipFile(file_path, 'r') as z:
-                    # Read main document
-                    with z.open('word/document.xml') as f:
-                        tree = ET.parse(f)
-                        root = tree.getroot()
-                        
-                        # Extract text from XML
-                        namespace = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
-                        for elem in root.iter(namespace + 't'):
-                            if elem.text:
-                                text.append(elem.text)
-                
-                return " ".join(text)
+                return await asyncio.to_thread(_extract_docx_xml_text, file_path)
                 
             except Exception as e:
                 print(f"Failed to extract DOCX content: {e}")
@@ -279,39 +692,22 @@ class ContentProcessor:
         metadata["type"] = "excel"
         
         try:
-            import pandas as pd
-            # Read all sheets
-            dfs = pd.read_excel(file_path, sheet_name=None)
-            
-            text = []
-            for sheet_name, df in dfs.items():
-                text.append(f"Sheet: {sheet_name}")
-                text.append(df.to_string())
-            
-            metadata["sheets"] = len(dfs)
-            return "\n\n".join(text)
-            
+            text, sheets = await asyncio.to_thread(_extract_excel_text, file_path)
         except ImportError:
-            print("pandas not installed for Excel processing")
+            print("openpyxl/pandas not installed for Excel processing")
             return await self._fallback_processor(file_path, metadata)
+        
+        metadata["sheets"] = sheets
+        return text
     
     async def _process_powerpoint(self, file_path: str, metadata: Dict, **kwargs) -> str:
         """Process PowerPoint files"""
         metadata["type"] = "powerpoint"
         
         try:
-            from pptx import Presentation
-            prs = Presentation(file_path)
-            
-            text = []
-            for i, slide in enumerate(prs.slides, 1):
-                text.append(f"Slide {i}:")
-                for shape in slide.shapes:
-                    if hasattr(shape, "text") and shape.text:
-                        text.append(shape.text)
-            
-            metadata["slides"] = len(prs.slides)
-            return "\n".join(text)
+            text, slides = await asyncio.to_thread(_extract_pptx_text, file_path)
+            metadata["slides"] = slides
+            return text
             
         except ImportError:
             print("python-pptx not installed for PowerPoint processing")
@@ -324,10 +720,7 @@ class ContentProcessor:
         # Option 1: OCR extraction
         if kwargs.get("use_ocr", False):
             try:
-                import pytesseract
-                from PIL import Image
-                img = Image.open(file_path)
-                text = pytesseract.image_to_string(img)
+                text = await asyncio.to_thread(_ocr_image, file_path)
                 metadata["ocr"] = True
                 return text
             except ImportError:
@@ -360,8 +753,8 @@ class ContentProcessor:
         """Fallback for unknown file types"""
         # Try to read as text
         try:
-            with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                content = f.read()
+            raw = await asyncio.to_thread(Path(file_path).read_bytes)
+            content = raw.decode("utf-8", errors="ignore")
             metadata["processor"] = "fallback_text"
             return content
         except:
@@ -370,13 +763,24 @@ class ContentProcessor:
             return f"Binary file: {Path(file_path).name} ({metadata.get('size', 0)} bytes)"
 
 
-# Singleton instance
-_content_processor: Optional[ContentProcessor] = None
+# Built-in processors worth moving to a worker process
+_CPU_BOUND_PROCESSORS = {
+    ContentProcessor._process_pdf,
+    ContentProcessor._process_docx,
+    ContentProcessor._process_excel,
+    ContentProcessor._process_powerpoint,
+}
+
 
+def _extract_sync(file_path: str, kwargs: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """Process one file inside a pool worker"""
+    global _IN_WORKER
+    _IN_WORKER = True
+    return asyncio.run(ContentProcessor()._process_file(file_path, **kwargs))
 
+
+# Singleton instance
+@cache
 def get_content_processor() -> ContentProcessor:
     """Get or create content processor singleton"""
-    global _content_processor
-    if _content_processor is None:
-        _content_processor = ContentProcessor()
-    return _content_processor
\ No newline at end of file
+    return ContentProcessor()
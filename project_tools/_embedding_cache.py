@@ -0,0 +1,119 @@
+"""
+Embedding Cache
+Content-addressed on-disk cache so unchanged text is never re-embedded
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+
+class EmbeddingCache:
+    """
+    SQLite-backed embedding cache keyed by a hash of (model, dim, task, text)
+    Vectors are stored as packed float32; only the max_entries most recently
+    used entries are kept (0 keeps everything)
+    """
+    
+    # Stay well below SQLite's bound-parameter limit
+    _LOOKUP_CHUNK = 500
+    
+    # Writes between checks of the entry bound
+    _PRUNE_EVERY = 100
+    
+    def __init__(self, cache_dir: str, max_entries: int = 50000):
+        path = Path(cache_dir).expanduser()
+        path.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(path / "embeddings.sqlite3"),
+            check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings "
+            "(key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL DEFAULT 0)"
+        )
+        # Caches created before eviction existed lack the column
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(embeddings)")}
+        if "last_used" not in columns:
+            self._conn.execute(
+                "ALTER TABLE embeddings ADD COLUMN last_used REAL NOT NULL DEFAULT 0"
+            )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+        )
+        self._conn.commit()
+        with self._lock:
+            self._prune()
+    
+    @staticmethod
+    def make_key(text: str, model: str, dim: int, task_type: str) -> str:
+        """Build the cache key for one text"""
+        return hashlib.blake2b(
+            f"{model}|{dim}|{task_type}|{text}".encode("utf-8"),
+            digest_size=16
+        ).hexdigest()
+    
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Return cached vectors for the keys that are present, marking them used"""
+        found = {}
+        now = time.time()
+        with self._lock:
+            for i in range(0, len(keys), self._LOOKUP_CHUNK):
+                chunk = keys[i:i + self._LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    chunk
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector.tolist()
+                if rows:
+                    hits = [key for key, _ in rows]
+                    self._conn.execute(
+                        f"UPDATE embeddings SET last_used = ? "
+                        f"WHERE key IN ({','.join('?' * len(hits))})",
+                        [now, *hits]
+                    )
+            if found:
+                self._conn.commit()
+        return found
+    
+    def set_many(self, items: Iterable[Tuple[str, List[float]]]):
+        """Store vectors, replacing existing entries"""
+        now = time.time()
+        rows = [(key, array("f", vector).tobytes(), now) for key, vector in items]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                rows
+            )
+            self._writes += 1
+            if self._writes % self._PRUNE_EVERY == 0:
+                self._prune()
+            self._conn.commit()
+    
+    def _prune(self):
+        """Drop the least recently used entries beyond max_entries (lock held)"""
+        if self.max_entries <= 0:
+            return
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        if count <= self.max_entries:
+            return
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE rowid NOT IN "
+            "(SELECT rowid FROM embeddings ORDER BY last_used DESC LIMIT ?)",
+            (self.max_entries,)
+        )
+        self._conn.commit()
@@ -4,6 +4,9 @@ Handles text embedding using Google's Gemini API
 """
 
 import asyncio
+import functools
+import itertools
+import random
 from typing import List, Optional
 try:
     # Try new API first
@@ -15,6 +18,48 @@ except ImportError:
     import google.generativeai as genai
     USE_NEW_API = False
 from ._rag_config import get_config
+from ._embedding_cache import EmbeddingCache
+
+# Errors worth retrying: rate limits, timeouts and server-side failures
+_TRANSIENT_ERRORS = (TimeoutError, asyncio.TimeoutError, ConnectionError)
+try:
+    from google.api_core import exceptions as api_exceptions
+    _TRANSIENT_ERRORS += (
+        api_exceptions.ResourceExhausted,
+        api_exceptions.DeadlineExceeded,
+        api_exceptions.ServiceUnavailable,
+        api_exceptions.InternalServerError,
+    )
+except ImportError:
+    pass
+try:
+    import httpx
+    _TRANSIENT_ERRORS += (httpx.TransportError,)
+except ImportError:
+    pass
+
+_TRANSIENT_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+# Backoff settings (seconds)
+_BACKOFF_BASE = 1.0
+_BACKOFF_CAP = 30.0
+
+
+def _is_transient(error: Exception) -> bool:
+    """Check whether an embedding error is worth retrying"""
+    if isinstance(error, _TRANSIENT_ERRORS):
+        return True
+    # google.genai APIError exposes the HTTP status as `code`
+    for attr in ("code", "status_code", "status"):
+        status = getattr(error, attr, None)
+        if isinstance(status, int):
+            return status in _TRANSIENT_STATUS_CODES
+    return False
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff delay for the given attempt"""
+    return random.uniform(0, min(_BACKOFF_CAP, _BACKOFF_BASE * 2 ** attempt))
 
 
 class EmbeddingClient:
@@ -26,6 +71,7 @@ class EmbeddingClient:
         self.config = config or get_config()
         self._initialized = False
         self._client = None
+        self._cache = None
     
     def _init_client(self):
         """Initialize Gemini client lazily"""
@@ -63,78 +109,99 @@ class EmbeddingClient:
     async def embed_batch(self, texts: List[str]) -> List[List[float]]:
         """
         Embed multiple texts with batching
-        Handles API limits automatically
+        Handles API limits automatically; cached texts skip the API
         """
         self._init_client()
+        return await self._embed_through_cache(texts, "RETRIEVAL_DOCUMENT", self._embed_uncached)
+    
+    async def _embed_through_cache(self, texts: List[str], task_type: str, embed) -> List[List[float]]:
+        """Serve texts from the on-disk cache when configured, embedding only the misses"""
+        cache = self._get_cache()
+        if cache is None:
+            return await embed(texts)
         
-        embeddings = []
+        keys = [
+            cache.make_key(
+                text, self.config.embedding_model, self.config.embedding_dim,
+                task_type
+            )
+            for text in texts
+        ]
+        cached = cache.get_many(keys)
+        misses = [i for i, key in enumerate(keys) if key not in cached]
+        
+        if misses:
+            fresh = await embed([texts[i] for i in misses])
+            # Zero vectors are failure fallbacks, not results worth keeping
+            cache.set_many((keys[i], emb) for i, emb in zip(misses, fresh) if any(emb))
+            cached.update((keys[i], emb) for i, emb in zip(misses, fresh))
+        
+        return [cached[key] for key in keys]
+    
+    async def _embed_uncached(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts through the API in concurrent batches"""
         batch_size = min(self.config.batch_size, 250)  # Gemini limit is 250
         
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            batch_embeddings = await self._embed_batch_with_retry(batch)
-            embeddings.extend(batch_embeddings)
+        # Batch texts of similar length together so no request is padded
+        # out to one long outlier, then restore input order
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        
+        # Send batches concurrently, bounded to respect rate limits
+        sem = asyncio.Semaphore(self.config.max_concurrent_requests)
+        results = await asyncio.gather(*[
+            self._bounded_embed(sem, [texts[j] for j in order[i:i + batch_size]])
+            for i in range(0, len(order), batch_size)
+        ])
+        
+        embeddings = [None] * len(texts)
+        for i, embedding in zip(order, itertools.chain.from_iterable(results)):
+            embeddings[i] = embedding
         
         return embeddings
     
+    def _get_cache(self) -> Optional[EmbeddingCache]:
+        """Get the on-disk embedding cache if configured"""
+        if self._cache is None and self.config.embed_cache_dir:
+            self._cache = EmbeddingCache(
+                self.config.embed_cache_dir, self.config.embed_cache_max_entries
+            )
+        return self._cache
+    
+    async def _bounded_embed(self, sem: asyncio.Semaphore, batch: List[str]) -> List[List[float]]:
+        """Embed one batch while holding a concurrency slot"""
+        async with sem:
+            return await self._embed_batch_with_retry(batch)
+    
     async def _embed_with_retry(self, text: str) -> List[float]:
         """Embed with exponential backoff retry"""
         for attempt in range(self.config.max_retries):
             try:
                 if USE_NEW_API:
                     # New API with google.genai
-                    result = self._client.models.embed_content(
-                        model="models/embedding-001",
-                        contents=text,
-                        config=types.EmbedContentConfig(
-                            task_type="RETRIEVAL_DOCUMENT",
-                            output_dimensionality=self.config.embedding_dim
-                        ) if 'types' in globals() else None
-                    )
-                    # Extract embedding from response
-                    if hasattr(result, 'embeddings'):
-                        emb = result.embeddings[0] if isinstance(result.embeddings, list) else result.embeddings
-                        # Handle ContentEmbedding object
-                        if hasattr(emb, 'values'):
-                            return emb.values
-                        return emb
-                    return result
+                    result = await self._embed_content(text, "RETRIEVAL_DOCUMENT")
+                    return self._extract_single(result)
                 else:
                     # Old API fallback - use genai.embed_content directly
-                    result = genai.embed_content(
-                        model="models/embedding-001",
-                        content=text,
-                        task_type="retrieval_document",
-                        output_dimensionality=self.config.embedding_dim
-                    )
-                    if hasattr(result, 'embedding'):
-                        emb = result['embedding']
-                        # Handle ContentEmbedding object
-                        if hasattr(emb, 'values'):
-                            return emb.values
-                        return emb
-                    return result
+                    result = await self._embed_content_legacy(text, "retrieval_document")
+                    return self._extract_single_legacy(result)
                     
             except Exception as e:
-                if attempt == self.config.max_retries - 1:
+                if attempt == self.config.max_retries - 1 or not _is_transient(e):
                     raise e
-                # Exponential backoff
-                await asyncio.sleep(2 ** attempt)
+                # Exponential backoff with full jitter
+                await asyncio.sleep(_backoff_delay(attempt))
     
-    async def _embed_batch_with_retry(self, texts: List[str]) -> List[List[float]]:
+    async def _embed_batch_with_retry(
+        self,
+        texts: List[str],
+        task_type: str = "RETRIEVAL_DOCUMENT"
+    ) -> List[List[float]]:
         """Batch embed with retry logic"""
         for attempt in range(self.config.max_retries):
             try:
                 if USE_NEW_API:
                     # New API supports batch embedding directly
-                    result = self._client.models.embed_content(
-                        model="models/embedding-001",
-                        contents=texts,
-                        config=types.EmbedContentConfig(
-                            task_type="RETRIEVAL_DOCUMENT",
-                            output_dimensionality=self.config.embedding_dim
-                        ) if 'types' in globals() else None
-                    )
+                    result = await self._embed_content(texts, task_type)
                     if hasattr(result, 'embeddings'):
                         # Extract values from ContentEmbedding objects
                         embeddings = []
@@ -149,27 +216,73 @@ class EmbeddingClient:
                     # Old API - embed one by one
                     embeddings = []
                     for text in texts:
-                        result = genai.embed_content(
-                            model="models/embedding-001",
-                            content=text,
-                            task_type="retrieval_document",
-                            output_dimensionality=self.config.embedding_dim
-                        )
-                        if hasattr(result, 'embedding'):
-                            emb = result['embedding']
-                            # Handle ContentEmbedding object
-                            if hasattr(emb, 'values'):
-                                embeddings.append(emb.values)
-                            else:
-                                embeddings.append(emb)
-                        else:
-                            embeddings.append(result)
+                        result = await self._embed_content_legacy(text, task_type.lower())
+                        embeddings.append(self._extract_single_legacy(result))
                     return embeddings
                 
             except Exception as e:
-                if attempt == self.config.max_retries - 1:
+                if attempt == self.config.max_retries - 1 or not _is_transient(e):
                     raise e
-                await asyncio.sleep(2 ** attempt)
+                await asyncio.sleep(_backoff_delay(attempt))
+    
+    async def _embed_content(self, contents, task_type: str):
+        """
+        Call the google.genai embed endpoint without blocking the event loop
+        Uses the SDK's async client when available, otherwise a worker thread
+        """
+        config = types.EmbedContentConfig(
+            task_type=task_type,
+            output_dimensionality=self.config.embedding_dim
+        ) if 'types' in globals() else None
+        
+        aio = getattr(self._client, "aio", None)
+        if aio is not None:
+            return await aio.models.embed_content(
+                model="models/embedding-001",
+                contents=contents,
+                config=config
+            )
+        
+        sync_embed = functools.partial(
+            self._client.models.embed_content,
+            model="models/embedding-001",
+            contents=contents,
+            config=config
+        )
+        return await asyncio.to_thread(sync_embed)
+    
+    async def _embed_content_legacy(self, text: str, task_type: str):
+        """Call google.generativeai embed_content in a worker thread"""
+        sync_embed = functools.partial(
+            genai.embed_content,
+            model="models/embedding-001",
+            content=text,
+            task_type=task_type,
+            output_dimensionality=self.config.embedding_dim
+        )
+        return await asyncio.to_thread(sync_embed)
+    
+    @staticmethod
+    def _extract_single(result):
+        """Extract one embedding from a google.genai response"""
+        if hasattr(result, 'embeddings'):
+            emb = result.embeddings[0] if isinstance(result.embeddings, list) else result.embeddings
+            # Handle ContentEmbedding object
+            if hasattr(emb, 'values'):
+                return emb.values
+            return emb
+        return result
+    
+    @staticmethod
+    def _extract_single_legacy(result):
+        """Extract one embedding from a google.generativeai response"""
+        if hasattr(result, 'embedding'):
+            emb = result['embedding']
+            # Handle ContentEmbedding object
+            if hasattr(emb, 'values'):
+                return emb.values
+            return emb
+        return result
     
     def embed_query(self, query: str) -> List[float]:
         """
@@ -189,13 +302,7 @@ class EmbeddingClient:
                         output_dimensionality=self.config.embedding_dim
                     ) if 'types' in globals() else None
                 )
-                # Extract embedding from response
-                if hasattr(result, 'embeddings'):
-                    emb = result.embeddings[0] if isinstance(result.embeddings, list) else result.embeddings
-                    if hasattr(emb, 'values'):
-                        return emb.values
-                    return emb
-                return result
+                return self._extract_single(result)
             else:
                 # Old API fallback
                 result = genai.embed_content(
@@ -204,25 +311,32 @@ class EmbeddingClient:
                     task_type="retrieval_query",  # Optimized for queries
                     output_dimensionality=self.config.embedding_dim
                 )
-                if hasattr(result, 'embedding'):
-                    emb = result['embedding']
-                    if hasattr(emb, 'values'):
-                        return emb.values
-                    return emb
-                return result
+                return self._extract_single_legacy(result)
                 
         except Exception as e:
             print(f"Query embedding error: {e}")
             return [0.0] * self.config.embedding_dim
+    
+    async def aembed_queries(self, queries: List[str]) -> List[List[float]]:
+        """
+        Async query embedding for several queries in one request
+        A failed batch falls back to zero vectors like embed_query
+        Served from the on-disk cache when RAG_EMBED_CACHE_DIR is set
+        """
+        self._init_client()
+        return await self._embed_through_cache(queries, "RETRIEVAL_QUERY", self._embed_queries_uncached)
+    
+    async def _embed_queries_uncached(self, queries: List[str]) -> List[List[float]]:
+        """Embed queries through the API in one request"""
+        try:
+            return await self._embed_batch_with_retry(queries, "RETRIEVAL_QUERY")
+        except Exception as e:
+            print(f"Query embedding error: {e}")
+            return [[0.0] * self.config.embedding_dim for _ in queries]
 
 
-# Singleton instance for reuse
-_embedding_client: Optional[EmbeddingClient] = None
-
-
+# Singleton instance
+@functools.cache
 def get_embedding_client() -> EmbeddingClient:
     """Get or create embedding client singleton"""
-    global _embedding_client
-    if _embedding_client is None:
-        _embedding_client = EmbeddingClient()
-    return _embedding_client
\ No newline at end of file
+    return EmbeddingClient()
@@ -3,12 +3,17 @@ RAG Configuration Module
 Centralized configuration for Agentic RAG tools
 """
 
+import functools
 import os
+import sys
 from typing import Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
+# slots= is only accepted by dataclass on Python 3.10+
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+
+@dataclass(frozen=True, **_SLOTS)
 class RAGConfig:
     """
     RAG configuration with environment variable support
@@ -16,29 +21,38 @@ class RAGConfig:
     """
     
     # Gemini Embedding Configuration
-    gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
+    gemini_api_key: str = field(default_factory=lambda: os.getenv("GEMINI_API_KEY", ""))
     embedding_model: str = "models/embedding-001"  # Gemini-embedding-001 model
-    embedding_dim: int = int(os.getenv("RAG_EMBEDDING_DIM", "768"))  # 768/1536/3072
+    embedding_dim: int = field(default_factory=lambda: int(os.getenv("RAG_EMBEDDING_DIM", "768")))  # 768/1536/3072
     
     # Vector Database Configuration
-    vector_db_type: str = os.getenv("RAG_VECTOR_DB", "qdrant")  # qdrant/memory
-    qdrant_host: str = os.getenv("QDRANT_HOST", "localhost")
-    qdrant_port: int = int(os.getenv("QDRANT_PORT", "6333"))
-    qdrant_api_key: Optional[str] = os.getenv("QDRANT_API_KEY")  # For cloud
-    qdrant_path: Optional[str] = os.getenv("QDRANT_PATH")  # For local disk
+    vector_db_type: str = field(default_factory=lambda: os.getenv("RAG_VECTOR_DB", "qdrant"))  # qdrant/memory
+    qdrant_host: str = field(default_factory=lambda: os.getenv("QDRANT_HOST", "localhost"))
+    qdrant_port: int = field(default_factory=lambda: int(os.getenv("QDRANT_PORT", "6333")))
+    qdrant_grpc_port: int = field(default_factory=lambda: int(os.getenv("QDRANT_GRPC_PORT", "6334")))
+    qdrant_prefer_grpc: bool = field(default_factory=lambda: os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true")
+    qdrant_api_key: Optional[str] = field(default_factory=lambda: os.getenv("QDRANT_API_KEY"))  # For cloud
+    qdrant_path: Optional[str] = field(default_factory=lambda: os.getenv("QDRANT_PATH"))  # For local disk
     
     # Collection Configuration
-    default_collection: str = os.getenv("RAG_DEFAULT_COLLECTION", "default")
-    distance_metric: str = os.getenv("RAG_DISTANCE_METRIC", "cosine")  # cosine/dot/euclidean
+    default_collection: str = field(default_factory=lambda: os.getenv("RAG_DEFAULT_COLLECTION", "default"))
+    distance_metric: str = field(default_factory=lambda: os.getenv("RAG_DISTANCE_METRIC", "cosine"))  # cosine/dot/euclidean
     
     # Reranker Configuration (for future use)
-    use_reranker: bool = os.getenv("RAG_USE_RERANKER", "false").lower() == "true"
-    reranker_model_path: Optional[str] = os.getenv("RERANKER_MODEL_PATH")
+    use_reranker: bool = field(default_factory=lambda: os.getenv("RAG_USE_RERANKER", "false").lower() == "true")
+    reranker_model_path: Optional[str] = field(default_factory=lambda: os.getenv("RERANKER_MODEL_PATH"))
+    reranker_onnx_path: Optional[str] = field(default_factory=lambda: os.getenv("RERANKER_ONNX_PATH"))  # Exported model, see .env.example
+    reranker_load_in_8bit: bool = field(default_factory=lambda: os.getenv("RAG_RERANKER_LOAD_IN_8BIT", "false").lower() == "true")
+    rerank_batch_size: Optional[int] = field(default_factory=lambda: int(os.getenv("RAG_RERANK_BATCH_SIZE", "0")) or None)  # Unset auto-tunes on GPU
+    use_torch_compile: bool = field(default_factory=lambda: os.getenv("RAG_USE_TORCH_COMPILE", "false").lower() == "true")
     
     # Performance Settings
-    batch_size: int = int(os.getenv("RAG_BATCH_SIZE", "10"))
-    max_retries: int = int(os.getenv("RAG_MAX_RETRIES", "3"))
-    timeout_seconds: int = int(os.getenv("RAG_TIMEOUT", "30"))
+    batch_size: int = field(default_factory=lambda: int(os.getenv("RAG_BATCH_SIZE", "10")))
+    max_retries: int = field(default_factory=lambda: int(os.getenv("RAG_MAX_RETRIES", "3")))
+    max_concurrent_requests: int = field(default_factory=lambda: int(os.getenv("RAG_MAX_CONCURRENT_REQUESTS", "8")))
+    embed_cache_dir: Optional[str] = field(default_factory=lambda: os.getenv("RAG_EMBED_CACHE_DIR"))  # Unset disables the cache
+    embed_cache_max_entries: int = field(default_factory=lambda: int(os.getenv("RAG_EMBED_CACHE_MAX_ENTRIES", "50000")))  # Least recently used beyond this are pruned, 0 = unbounded
+    timeout_seconds: int = field(default_factory=lambda: int(os.getenv("RAG_TIMEOUT", "30")))
     
     def validate(self) -> Optional[str]:
         """Validate configuration"""
@@ -52,22 +66,17 @@ class RAGConfig:
 
 
 # Singleton instance
-_config: Optional[RAGConfig] = None
-
-
+@functools.cache
 def get_config() -> RAGConfig:
     """Get or create RAG configuration singleton"""
-    global _config
-    if _config is None:
-        _config = RAGConfig()
-        # Validate on first load
-        error = _config.validate()
-        if error:
-            print(f"Warning: RAG Config - {error}")
-    return _config
+    config = RAGConfig()
+    # Validate on first load
+    error = config.validate()
+    if error:
+        print(f"Warning: RAG Config - {error}")
+    return config
 
 
 def reset_config():
     """Reset configuration (mainly for testing)"""
-    global _config
-    _config = None
\ No newline at end of file
+    get_config.cache_clear()
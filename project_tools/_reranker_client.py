@@ -3,14 +3,71 @@ Qwen3-Reranker-8B Client
 Handles document reranking using local Qwen3 model
 """
 
+import asyncio
+import math
+import os
+import numpy as np
 import torch
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Tuple, Optional
-from transformers import AutoModelForSequenceClassification, AutoTokenizer
+from transformers import (
+    AutoConfig, AutoModelForSequenceClassification, AutoTokenizer,
+    BitsAndBytesConfig, GPTQConfig
+)
 import warnings
 warnings.filterwarnings("ignore")
 
 from ._rag_config import get_config
 
+# Inductor cache location used when torch.compile is enabled
+_INDUCTOR_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "rag_reranker_inductor")
+
+# Batch size used on CPU or when GPU probing isn't possible
+_DEFAULT_BATCH_SIZE = 4
+_BATCH_CANDIDATES = (32, 16, 8, 4, 2, 1)
+
+# Reranking gets its own worker so long forwards don't occupy the event
+# loop's default pool; one worker also serializes access to the model
+_RERANK_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+
+
+def _pair_template(tokenizer) -> Tuple[List[int], List[int], List[int], Optional[Tuple[int, int]]]:
+    """
+    Special-token layout of a [query, doc] pair
+    Returns (prefix, middle, suffix, (query_type, doc_type) or None)
+    """
+    # Negative sentinels can't collide with real special token ids
+    ids = tokenizer.build_inputs_with_special_tokens([-1], [-2])
+    q_pos, d_pos = ids.index(-1), ids.index(-2)
+    types = None
+    if "token_type_ids" in tokenizer.model_input_names:
+        type_ids = tokenizer.create_token_type_ids_from_sequences([-1], [-2])
+        types = (type_ids[q_pos], type_ids[d_pos])
+    return ids[:q_pos], ids[q_pos + 1:d_pos], ids[d_pos + 1:], types
+
+
+def _truncate_pair(query_ids: List[int], doc_ids: List[int], budget: int) -> Tuple[List[int], List[int]]:
+    """Longest-first truncation of a pair to budget tokens (same split as transformers)"""
+    overflow = len(query_ids) + len(doc_ids) - budget
+    if overflow <= 0:
+        return query_ids, doc_ids
+    first = min(abs(len(query_ids) - len(doc_ids)), overflow)
+    second = overflow - first
+    if len(query_ids) > len(doc_ids):
+        query_cut, doc_cut = first + second // 2, second - second // 2
+    else:
+        query_cut, doc_cut = second // 2, first + second - second // 2
+    return query_ids[:len(query_ids) - query_cut], doc_ids[:len(doc_ids) - doc_cut]
+
+
+def _sigmoid(x: float) -> float:
+    """Numerically stable logistic function"""
+    if x >= 0:
+        return 1.0 / (1.0 + math.exp(-x))
+    z = math.exp(x)
+    return z / (1.0 + z)
+
 
 class RerankerClient:
     """
@@ -23,6 +80,12 @@ class RerankerClient:
         self._model = None
         self._tokenizer = None
         self._device = None
+        self._batch_size = _DEFAULT_BATCH_SIZE
+        self._copy_stream = None
+        self._pair_template = None
+        self._onnx_session = None
+        self._onnx_input_names = []
+        self._onnx_output_name = None
         self._initialized = False
     
     def _init_model(self):
@@ -53,32 +116,45 @@ class RerankerClient:
                 self.config.reranker_model_path,
                 trust_remote_code=True
             )
+            # Pairs are assembled from pre-encoded ids around this template
+            self._pair_template = _pair_template(self._tokenizer)
             
-            # Disable torch compile to avoid Triton requirement
-            import os
-            os.environ["TORCH_COMPILE_DISABLE"] = "1"
-            os.environ["TORCHDYNAMO_DISABLE"] = "1"
+            if self.config.use_torch_compile:
+                # Persist compiled kernels so later process starts reuse them
+                os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", _INDUCTOR_CACHE_DIR)
+            else:
+                # Disable torch compile to avoid Triton requirement
+                os.environ["TORCH_COMPILE_DISABLE"] = "1"
+                os.environ["TORCHDYNAMO_DISABLE"] = "1"
+            
+            # An exported ONNX model replaces the PyTorch forward when configured
+            if self.config.reranker_onnx_path and self._init_onnx():
+                # No torch model to auto-tune against; honour the configured size
+                self._batch_size = self.config.rerank_batch_size or _DEFAULT_BATCH_SIZE
+                self._initialized = True
+                print("Qwen3-Reranker-8B ready! (ONNX Runtime)")
+                return
             
             # Load GPTQ quantized model (already quantized, no need for BitsAndBytes)
             if self._device.type == "cuda":
-                # Load GPTQ model directly
-                self._model = AutoModelForSequenceClassification.from_pretrained(
-                    self.config.reranker_model_path,
-                    device_map="auto",
-                    trust_remote_code=True,
-                    torch_dtype=torch.float16  # Use FP16 for efficiency
-                )
-                print("GPTQ model loaded on GPU")
+                self._model = self._load_gpu_model()
             else:
                 # CPU loading
-                self._model = AutoModelForSequenceClassification.from_pretrained(
-                    self.config.reranker_model_path,
+                self._model = self._from_pretrained(
                     device_map="cpu",
                     trust_remote_code=True
                 )
                 print("Model loaded on CPU")
+                if self.config.reranker_load_in_8bit:
+                    self._model = self._quantize_cpu(self._model)
             
             self._model.eval()
+            if self._device.type == "cuda":
+                # Side stream for host-to-device input copies
+                self._copy_stream = torch.cuda.Stream()
+            self._batch_size = self.config.rerank_batch_size or self._auto_tune_batch()
+            if self.config.use_torch_compile:
+                self._compile_model()
             self._initialized = True
             print("Qwen3-Reranker-8B ready!")
             
@@ -86,6 +162,212 @@ class RerankerClient:
             print(f"Failed to load reranker model: {e}")
             self._initialized = False
     
+    def _init_onnx(self) -> bool:
+        """Create the ONNX Runtime session, False to fall back to PyTorch"""
+        if not os.path.exists(self.config.reranker_onnx_path):
+            print(f"Warning: RERANKER_ONNX_PATH not found: {self.config.reranker_onnx_path}")
+            return False
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            print("Warning: onnxruntime not installed, using PyTorch model")
+            return False
+        
+        if self._device.type == "cuda" and "CUDAExecutionProvider" in ort.get_available_providers():
+            device = self._device
+            providers = [
+                ("CUDAExecutionProvider", {"device_id": self._device.index or 0}),
+                "CPUExecutionProvider"
+            ]
+        else:
+            device = torch.device("cpu")
+            providers = ["CPUExecutionProvider"]
+        
+        session = ort.InferenceSession(self.config.reranker_onnx_path, providers=providers)
+        input_names = [i.name for i in session.get_inputs()]
+        
+        # The graph must only ask for inputs _encode_batch builds
+        encoded = {"input_ids", "attention_mask"}
+        if self._pair_template[3] is not None:
+            encoded.add("token_type_ids")
+        missing = sorted(set(input_names) - encoded)
+        if missing:
+            print(f"Warning: ONNX model expects inputs the tokenizer doesn't provide ({', '.join(missing)}), using PyTorch model")
+            return False
+        
+        self._device = device
+        self._onnx_session = session
+        self._onnx_input_names = input_names
+        self._onnx_output_name = session.get_outputs()[0].name
+        return True
+    
+    def _from_pretrained(self, **kwargs):
+        """Load the model, preferring fused scaled-dot-product attention"""
+        try:
+            return AutoModelForSequenceClassification.from_pretrained(
+                self.config.reranker_model_path,
+                attn_implementation="sdpa",
+                **kwargs
+            )
+        except ValueError:
+            # Architecture without an SDPA implementation
+            print("SDPA attention unavailable for this model, using default attention")
+            return AutoModelForSequenceClassification.from_pretrained(
+                self.config.reranker_model_path,
+                **kwargs
+            )
+    
+    def _gptq_bits(self) -> Optional[int]:
+        """Return the weight bits if the checkpoint is GPTQ-quantized"""
+        model_config = AutoConfig.from_pretrained(
+            self.config.reranker_model_path,
+            trust_remote_code=True
+        )
+        quant_config = getattr(model_config, "quantization_config", None) or {}
+        if not isinstance(quant_config, dict):
+            quant_config = quant_config.to_dict()
+        if quant_config.get("quant_method") != "gptq":
+            return None
+        return quant_config.get("bits", 4)
+    
+    def _load_gpu_model(self):
+        """Load the model on GPU, using fused int4 kernels where supported"""
+        load_kwargs = dict(
+            device_map="auto",
+            trust_remote_code=True,
+            torch_dtype=torch.float16  # FP16 activations (W4A16)
+        )
+        
+        # ExLlamaV2 kernels dequantize int4 weights inside the GEMM; Ampere+ only
+        bits = self._gptq_bits()
+        if bits == 4 and torch.cuda.get_device_capability() >= (8, 0):
+            try:
+                model = self._from_pretrained(
+                    quantization_config=GPTQConfig(
+                        bits=bits,
+                        use_exllama=True,
+                        exllama_config={"version": 2}
+                    ),
+                    **load_kwargs
+                )
+                print("GPTQ model loaded on GPU (ExLlamaV2 kernels)")
+                return model
+            except Exception as e:
+                print(f"ExLlamaV2 kernels unavailable ({e}), using default GPTQ kernels")
+        
+        # Unquantized checkpoints can opt into bitsandbytes LLM.int8() weights
+        elif bits is None and self.config.reranker_load_in_8bit:
+            try:
+                model = self._from_pretrained(
+                    quantization_config=BitsAndBytesConfig(
+                        load_in_8bit=True,
+                        llm_int8_threshold=6.0
+                    ),
+                    **load_kwargs
+                )
+                print("Model loaded on GPU (bitsandbytes INT8)")
+                return model
+            except Exception as e:
+                print(f"INT8 loading unavailable ({e}), using FP16")
+        
+        # Unquantized weights run in BF16 where supported: FP16 speed with FP32 range
+        if bits is None and torch.cuda.is_bf16_supported():
+            load_kwargs["torch_dtype"] = torch.bfloat16
+        
+        # Load GPTQ model directly
+        model = self._from_pretrained(**load_kwargs)
+        print("GPTQ model loaded on GPU" if bits else "Model loaded on GPU")
+        return model
+    
+    def _quantize_cpu(self, model):
+        """
+        Dynamic INT8 quantization of Linear layers for CPU inference
+        Weights are stored as int8 and matmuls use VNNI dot products where available
+        """
+        try:
+            model = torch.ao.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+            print("Model quantized to INT8 (dynamic) for CPU")
+        except Exception as e:
+            print(f"INT8 quantization unavailable ({e}), using FP32")
+        return model
+    
+    def _auto_tune_batch(self, sample_len: int = 512) -> int:
+        """
+        Find the largest batch size whose forward fits in free GPU memory
+        Probes full-length dummy batches, keeping 15% headroom
+        """
+        if self._device.type != "cuda":
+            return _DEFAULT_BATCH_SIZE
+        
+        pad_id = self._tokenizer.pad_token_id or 0
+        for batch_size in _BATCH_CANDIDATES:
+            try:
+                torch.cuda.empty_cache()
+                free_before, _ = torch.cuda.mem_get_info()
+                base = torch.cuda.memory_allocated()
+                torch.cuda.reset_peak_memory_stats()
+                
+                input_ids = torch.full(
+                    (batch_size, sample_len), pad_id, dtype=torch.long, device=self._device
+                )
+                with torch.inference_mode():
+                    self._model(input_ids=input_ids, attention_mask=torch.ones_like(input_ids))
+                del input_ids
+                
+                peak = torch.cuda.max_memory_allocated() - base
+                if peak * 1.15 <= free_before:
+                    print(f"Reranker batch size: {batch_size}")
+                    return batch_size
+            except torch.cuda.OutOfMemoryError:
+                pass
+            finally:
+                torch.cuda.empty_cache()
+        
+        return 1
+    
+    def _compile_model(self):
+        """Compile the forward pass and warm it up, staying eager on failure"""
+        eager_model = self._model
+        try:
+            self._model = torch.compile(
+                eager_model,
+                mode="reduce-overhead",
+                fullgraph=False,
+                dynamic=True
+            )
+            # Compilation happens on first call; pay it here, not on a user request
+            warmup = self._tokenizer(
+                ["warmup"],
+                ["doc"],
+                padding="max_length",
+                max_length=64,
+                return_tensors="pt"
+            )
+            with torch.inference_mode():
+                self._model(**{k: v.to(self._device) for k, v in warmup.items()})
+            print("Reranker forward compiled with torch.compile")
+        except Exception as e:
+            print(f"torch.compile failed ({e}), using eager mode")
+            self._model = eager_model
+    
+    async def arerank(
+        self,
+        query: str,
+        documents: List[str],
+        top_k: int = 3,
+        threshold: Optional[float] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Async rerank, same arguments and result as rerank
+        Runs on the dedicated rerank thread so the event loop stays free
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _RERANK_EXECUTOR, self.rerank, query, documents, top_k, threshold
+        )
+    
     def rerank(
         self,
         query: str,
@@ -103,75 +385,170 @@ class RerankerClient:
             threshold: Minimum score threshold
         
         Returns:
-            List of (document, score) tuples, sorted by relevance
+            List of (document, score) tuples, sorted by relevance;
+            scores are sigmoid probabilities in [0, 1] (a single document
+            without threshold is returned as-is with score 1.0)
         """
         if not self.config.use_reranker:
             # Return original order if reranker is disabled
             return [(doc, 1.0) for doc in documents[:top_k]]
         
+        # Nothing to reorder: skip model loading and the forward pass.
+        # A lone document keeps the unit score of the disabled path
+        if not documents or top_k <= 0:
+            return []
+        if threshold is None and len(documents) == 1:
+            return [(documents[0], 1.0)]
+        
         # Initialize model if needed
         if not self._initialized:
             self._init_model()
         
-        if not self._initialized or self._model is None:
+        if not self._initialized or (self._model is None and self._onnx_session is None):
             # Fallback if model loading failed
             print("Warning: Reranker not available, returning original order")
             return [(doc, 1.0) for doc in documents[:top_k]]
         
         try:
-            # Prepare query-document pairs
-            pairs = [[query, doc] for doc in documents]
-            
-            # Tokenize in batches to avoid memory issues
-            batch_size = 4  # Adjust based on GPU memory
-            all_scores = []
+            logits = self._score_pairs(query, documents)
             
-            with torch.no_grad():
-                for i in range(0, len(pairs), batch_size):
-                    batch_pairs = pairs[i:i + batch_size]
-                    
-                    # Tokenize batch
-                    inputs = self._tokenizer(
-                        batch_pairs,
-                        padding=True,
-                        truncation=True,
-                        max_length=512,
-                        return_tensors="pt"
-                    ).to(self._device)
-                    
-                    # Get scores
-                    outputs = self._model(**inputs)
-                    logits = outputs.logits
-                    
-                    # Handle different output formats
-                    if len(logits.shape) > 1 and logits.shape[-1] > 1:
-                        # Multi-class output, take first class as relevance score
-                        scores = torch.sigmoid(logits[:, 0])
-                    else:
-                        # Single score output
-                        scores = torch.sigmoid(logits.squeeze(-1))
-                    
-                    scores = scores.cpu().numpy()
-                    all_scores.extend(scores.tolist())
+            # Sort by score (descending); stable so ties keep input order
+            order = np.argsort(-logits, kind="stable")
             
-            # Combine documents with scores
-            doc_scores = list(zip(documents, all_scores))
-            
-            # Sort by score (descending)
-            doc_scores.sort(key=lambda x: x[1], reverse=True)
-            
-            # Apply threshold if provided
-            if threshold is not None:
-                doc_scores = [(doc, score) for doc, score in doc_scores if score >= threshold]
-            
-            # Return top_k results
-            return doc_scores[:top_k]
+            # Sigmoid is monotonic: rank on logits, calibrate only what is returned.
+            # Sorted order lets the threshold stop the scan at the first miss
+            results = []
+            for i in order[:top_k]:
+                score = _sigmoid(float(logits[i]))
+                if threshold is not None and score < threshold:
+                    break
+                results.append((documents[i], score))
+            return results
             
         except Exception as e:
             print(f"Error during reranking: {e}")
             # Fallback to original order
             return [(doc, 1.0) for doc in documents[:top_k]]
     
+    def _score_pairs(self, query: str, documents: List[str]) -> np.ndarray:
+        """Score query-document pairs, returning raw logits in input order"""
+        if not documents:
+            return np.zeros(0, dtype=np.float32)
+        
+        # Encode the query once and each document once, without
+        # special tokens; pairs are assembled from the cached ids
+        query_ids = self._tokenizer(query, add_special_tokens=False)["input_ids"]
+        doc_ids = self._tokenizer(documents, add_special_tokens=False)["input_ids"]
+        
+        # Sort by token length so each batch pads to similar lengths
+        order = sorted(range(len(documents)), key=lambda i: len(doc_ids[i]))
+        
+        # Tokenize in batches to avoid memory issues
+        batch_size = self._batch_size
+        batches = [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+        batch_scores = []
+        
+        with torch.inference_mode():
+            next_inputs = self._to_device(self._encode_batch(query_ids, doc_ids, batches[0]))
+            for n, batch_idx in enumerate(batches):
+                inputs = next_inputs
+                if self._copy_stream is not None:
+                    # Forward must see the finished copy; tensors now belong to this stream
+                    current = torch.cuda.current_stream()
+                    current.wait_stream(self._copy_stream)
+                    for v in inputs.values():
+                        v.record_stream(current)
+                
+                # Queue the next batch's copy so it overlaps this forward
+                if n + 1 < len(batches):
+                    next_inputs = self._to_device(
+                        self._encode_batch(query_ids, doc_ids, batches[n + 1])
+                    )
+                
+                # Get scores
+                logits = self._forward(inputs)
+                
+                # Handle different output formats (raw logits, sigmoid comes later)
+                if len(logits.shape) > 1 and logits.shape[-1] > 1:
+                    # Multi-class output, take first class as relevance score
+                    scores = logits[:, 0]
+                else:
+                    # Single score output
+                    scores = logits.squeeze(-1)
+                batch_scores.append(scores.float())
+        
+        # One device-to-host copy at the end instead of a sync per batch,
+        # then scatter back to input order
+        all_scores = np.zeros(len(documents), dtype=np.float32)
+        all_scores[order] = torch.cat(batch_scores).cpu().numpy()
+        return all_scores
+    
+    def _forward(self, inputs: dict) -> torch.Tensor:
+        """Run one batch through the model, returning logits"""
+        if self._onnx_session is None:
+            return self._model(**inputs).logits
+        
+        # IOBinding: ORT reads the input tensors where they already live
+        # (GPU memory on CUDA) instead of taking host numpy copies
+        if self._device.type == "cuda":
+            torch.cuda.current_stream().synchronize()
+        device_id = self._device.index or 0
+        bound = [inputs[name].to(torch.int64).contiguous() for name in self._onnx_input_names]
+        binding = self._onnx_session.io_binding()
+        for name, tensor in zip(self._onnx_input_names, bound):
+            binding.bind_input(
+                name, self._device.type, device_id, np.int64,
+                tuple(tensor.shape), tensor.data_ptr()
+            )
+        binding.bind_output(self._onnx_output_name, self._device.type, device_id)
+        self._onnx_session.run_with_iobinding(binding)
+        return torch.from_numpy(binding.copy_outputs_to_cpu()[0])
+    
+    def _encode_batch(self, query_ids: List[int], doc_ids: List[List[int]], batch_idx: List[int]) -> dict:
+        """
+        Build padded CPU tensors for one batch from pre-encoded ids
+        The query ids are reused for every pair, no per-pair tokenizer calls
+        """
+        prefix, middle, suffix, types = self._pair_template
+        budget = 512 - len(prefix) - len(middle) - len(suffix)
+        
+        rows, type_rows = [], []
+        for j in batch_idx:
+            query, doc = _truncate_pair(query_ids, doc_ids[j], budget)
+            rows.append(prefix + query + middle + doc + suffix)
+            if types is not None:
+                head = len(prefix) + len(query) + len(middle)
+                type_rows.append([types[0]] * head + [types[1]] * (len(doc) + len(suffix)))
+        
+        # Pad to the batch's longest pair on the tokenizer's padding side
+        width = max(map(len, rows))
+        left = self._tokenizer.padding_side == "left"
+        input_ids = torch.full((len(rows), width), self._tokenizer.pad_token_id or 0, dtype=torch.long)
+        attention_mask = torch.zeros((len(rows), width), dtype=torch.long)
+        token_type_ids = torch.zeros((len(rows), width), dtype=torch.long) if types is not None else None
+        for r, row in enumerate(rows):
+            span = slice(width - len(row), width) if left else slice(0, len(row))
+            input_ids[r, span] = torch.tensor(row)
+            attention_mask[r, span] = 1
+            if token_type_ids is not None:
+                token_type_ids[r, span] = torch.tensor(type_rows[r])
+        
+        batch = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if token_type_ids is not None:
+            batch["token_type_ids"] = token_type_ids
+        return batch
+    
+    def _to_device(self, batch) -> dict:
+        """Move a batch to the model device, asynchronously on CUDA"""
+        if self._copy_stream is None:
+            return {k: v.to(self._device) for k, v in batch.items()}
+        # Pinned host memory lets the copy run on the side stream without blocking
+        with torch.cuda.stream(self._copy_stream):
+            return {
+                k: v.pin_memory().to(self._device, non_blocking=True)
+                for k, v in batch.items()
+            }
+    
     def get_scores(self, query: str, documents: List[str]) -> List[float]:
         """
         Get relevance scores without reordering
@@ -187,23 +564,15 @@ class RerankerClient:
             return [1.0] * len(documents)
         
         try:
-            doc_scores = self.rerank(query, documents, top_k=len(documents))
-            # Create a mapping from document to score
-            score_map = {doc: score for doc, score in doc_scores}
-            # Return scores in original order
-            return [score_map.get(doc, 0.0) for doc in documents]
+            # Scores come back in input order, duplicates keep their own score
+            return [_sigmoid(x) for x in self._score_pairs(query, documents).tolist()]
         except Exception as e:
             print(f"Error getting scores: {e}")
             return [1.0] * len(documents)
 
 
 # Singleton instance
-_reranker_client: Optional[RerankerClient] = None
-
-
+@functools.cache
 def get_reranker_client() -> RerankerClient:
     """Get or create reranker client singleton"""
-    global _reranker_client
-    if _reranker_client is None:
-        _reranker_client = RerankerClient()
-    return _reranker_client
\ No newline at end of file
+    return RerankerClient()
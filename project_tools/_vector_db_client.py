@@ -3,16 +3,81 @@ Vector Database Client
 Handles Qdrant vector database operations
 """
 
+import asyncio
+import functools
+import time
 from typing import List, Dict, Any, Optional, Tuple
 from qdrant_client import QdrantClient
 from qdrant_client.models import (
     Distance, VectorParams, PointStruct,
     Filter, FieldCondition, Range, MatchValue,
-    SearchRequest, SearchParams
+    SearchRequest, SearchParams, QuantizationSearchParams,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType, HnswConfigDiff,
+    PayloadSchemaType, PointIdsList
 )
 import uuid
 from ._rag_config import get_config
 
+# Points fetched per scroll request when listing indexed sources
+_SCROLL_PAGE_SIZE = 1024
+
+# Points per upsert request for remote servers
+_UPSERT_CHUNK_SIZE = 256
+
+# Distinct sources requested from the facet API; a full page means
+# there may be more, so the scroll path is used instead
+_FACET_LIMIT = 10000
+
+# Upper bound on how long cached listings are reused
+_CACHE_TTL_SECONDS = 30.0
+
+
+def _condition_kind(value: Any) -> Optional[str]:
+    """Classify a filter value: range dict, exact match, or ignored"""
+    if isinstance(value, dict):
+        # Range filter
+        return "range" if "gte" in value or "lte" in value else None
+    # Exact match
+    return "match"
+
+
+@functools.lru_cache(maxsize=128)
+def _filter_template(schema: Tuple[Tuple[str, Optional[str]], ...]):
+    """Compile a filter schema into a function that fills in the values"""
+    builders = []
+    for key, kind in schema:
+        if kind == "range":
+            builders.append(lambda d, key=key: FieldCondition(
+                key=key,
+                range=Range(gte=d[key].get("gte"), lte=d[key].get("lte"))
+            ))
+        elif kind == "match":
+            builders.append(lambda d, key=key: FieldCondition(
+                key=key,
+                match=MatchValue(value=d[key])
+            ))
+    
+    if not builders:
+        return lambda d: None
+    return lambda d: Filter(must=[build(d) for build in builders])
+
+
+@functools.lru_cache(maxsize=32)
+def _search_params(top_k: int) -> SearchParams:
+    """Search params for a result count, built once per top_k and reused read-only"""
+    return SearchParams(
+        hnsw_ef=max(64, top_k),
+        quantization=QuantizationSearchParams(rescore=True, oversampling=2.0)
+    )
+
+
+def _build_filter(filter_dict: Optional[Dict[str, Any]]) -> Optional[Filter]:
+    """Translate a filter dict ({key: value} or {key: {"gte", "lte"}}) into a Qdrant filter"""
+    if not filter_dict:
+        return None
+    schema = tuple((key, _condition_kind(value)) for key, value in filter_dict.items())
+    return _filter_template(schema)(filter_dict)
+
 
 class VectorDBClient:
     """
@@ -24,6 +89,10 @@ class VectorDBClient:
         self.config = config or get_config()
         self._client = None
         self._collections = set()
+        # collection -> (checked_at, points_count, sources) from the last full scroll
+        self._indexed_files_cache: Dict[str, Tuple[float, int, List[str]]] = {}
+        # (fetched_at, collections) from the last list_collections
+        self._collections_list_cache: Optional[Tuple[float, List[Dict[str, Any]]]] = None
     
     def _get_client(self) -> QdrantClient:
         """Get or create Qdrant client lazily"""
@@ -39,6 +108,8 @@ class VectorDBClient:
                 # For local Docker with API key authentication
                 self._client = QdrantClient(
                     url=f"http://{self.config.qdrant_host}:{self.config.qdrant_port}",
+                    grpc_port=self.config.qdrant_grpc_port,
+                    prefer_grpc=self.config.qdrant_prefer_grpc,  # Binary protocol, no JSON encoding
                     api_key=self.config.qdrant_api_key,
                     timeout=self.config.timeout_seconds
                 )
@@ -57,9 +128,14 @@ class VectorDBClient:
         client = self._get_client()
         
         try:
-            # Check if collection exists
-            collections = client.get_collections().collections
-            exists = any(c.name == collection_name for c in collections)
+            # Check if collection exists (single lookup; qdrant-client < 1.8
+            # has no collection_exists, so list collections there)
+            collection_exists = getattr(client, "collection_exists", None)
+            if collection_exists is not None:
+                exists = collection_exists(collection_name)
+            else:
+                collections = client.get_collections().collections
+                exists = any(c.name == collection_name for c in collections)
             
             if not exists:
                 # Create collection with configured settings
@@ -77,9 +153,26 @@ class VectorDBClient:
                             self.config.distance_metric, 
                             Distance.COSINE
                         )
+                    ),
+                    hnsw_config=HnswConfigDiff(m=16, ef_construct=128),
+                    # INT8 copies in RAM for search, originals kept for rescoring
+                    quantization_config=ScalarQuantization(
+                        scalar=ScalarQuantizationConfig(
+                            type=ScalarType.INT8,
+                            quantile=0.99,
+                            always_ram=True
+                        )
                     )
                 )
+                if not self._is_local():
+                    # Keyword index on source backs the facet-based file listing
+                    client.create_payload_index(
+                        collection_name=collection_name,
+                        field_name="source",
+                        field_schema=PayloadSchemaType.KEYWORD
+                    )
                 self._collections.add(collection_name)
+                self._collections_list_cache = None
                 return True
             
             self._collections.add(collection_name)
@@ -99,6 +192,7 @@ class VectorDBClient:
     ) -> int:
         """
         Insert or update vectors with documents
+        vectors may also be a 2-D numpy array
         Returns number of vectors inserted
         """
         collection_name = collection_name or self.config.default_collection
@@ -106,35 +200,63 @@ class VectorDBClient:
         
         client = self._get_client()
         
+        # Cached listings of this collection are stale after the write
+        self._invalidate_caches(collection_name)
+        
+        # numpy input: convert in one C-level pass rather than row by row
+        if hasattr(vectors, "tolist"):
+            vectors = vectors.tolist()
+        
         # Generate IDs if not provided
         if ids is None:
             ids = [str(uuid.uuid4()) for _ in range(len(vectors))]
         
-        # Prepare metadata
+        # Payload is the metadata plus the document, one fresh dict per point
+        # (the caller's dicts are left untouched)
         if metadata is None:
-            metadata = [{}] * len(vectors)
-        
-        # Add documents to metadata
-        for i, meta in enumerate(metadata):
-            meta["document"] = documents[i]
+            payloads = [{"document": doc} for doc in documents]
+        else:
+            payloads = [{**meta, "document": doc} for meta, doc in zip(metadata, documents)]
         
         # Create points
         points = [
-            PointStruct(
-                id=ids[i],
-                vector=vectors[i],
-                payload=metadata[i]
-            )
-            for i in range(len(vectors))
+            PointStruct(id=point_id, vector=vector, payload=payload)
+            for point_id, vector, payload in zip(ids, vectors, payloads)
         ]
         
         try:
-            # Batch upsert
-            operation_info = client.upsert(
-                collection_name=collection_name,
-                points=points,
-                wait=True
-            )
+            if self._is_local():
+                # Local modes apply writes in-process, nothing to overlap
+                client.upsert(
+                    collection_name=collection_name,
+                    points=points,
+                    wait=True
+                )
+                return len(points)
+            
+            # Send all but the last chunk concurrently without waiting for indexing,
+            # then the last one with wait=True: the server applies updates in
+            # order, so its completion means every earlier chunk is applied too
+            chunks = [
+                points[i:i + _UPSERT_CHUNK_SIZE]
+                for i in range(0, len(points), _UPSERT_CHUNK_SIZE)
+            ]
+            await asyncio.gather(*(
+                asyncio.to_thread(
+                    client.upsert,
+                    collection_name=collection_name,
+                    points=chunk,
+                    wait=False
+                )
+                for chunk in chunks[:-1]
+            ))
+            if chunks:
+                await asyncio.to_thread(
+                    client.upsert,
+                    collection_name=collection_name,
+                    points=chunks[-1],
+                    wait=True
+                )
             
             return len(points)
             
@@ -142,23 +264,44 @@ class VectorDBClient:
             print(f"Error upserting vectors: {e}")
             return 0
     
+    def _is_local(self) -> bool:
+        """Whether Qdrant runs in-process (memory or local disk)"""
+        return self.config.vector_db_type == "memory" or bool(self.config.qdrant_path)
+    
+    def _invalidate_caches(self, collection_name: str):
+        """Drop cached listings affected by a write to a collection"""
+        self._indexed_files_cache.pop(collection_name, None)
+        self._collections_list_cache = None
+    
     async def list_collections(self) -> List[Dict[str, Any]]:
         """
         List all collections in the database
+        Cached for a short TTL, dropped on local writes
         """
+        cached = self._collections_list_cache
+        if cached is not None and time.monotonic() - cached[0] < _CACHE_TTL_SECONDS:
+            # Fresh dicts so callers can't mutate the cached entries
+            return [dict(entry) for entry in cached[1]]
+        
         client = self._get_client()
-        collections = client.get_collections()
+        collections = await asyncio.to_thread(client.get_collections)
+        names = [collection.name for collection in collections.collections]
         
-        result = []
-        for collection in collections.collections:
-            info = client.get_collection(collection.name)
-            result.append({
-                "name": collection.name,
+        # Fetch details concurrently, one round trip instead of one per collection
+        infos = await asyncio.gather(
+            *(asyncio.to_thread(client.get_collection, name) for name in names)
+        )
+        
+        result = [
+            {
+                "name": name,
                 "vectors_count": info.vectors_count,
                 "points_count": info.points_count
-            })
-        
-        return result
+            }
+            for name, info in zip(names, infos)
+        ]
+        self._collections_list_cache = (time.monotonic(), result)
+        return [dict(entry) for entry in result]
     
     async def get_collection_info(self, collection_name: str) -> Optional[Dict[str, Any]]:
         """
@@ -180,41 +323,93 @@ class VectorDBClient:
     async def get_indexed_files(self, collection_name: str) -> List[str]:
         """
         Get list of all unique source files indexed in collection
+        Cached per collection, dropped on local writes
         """
         client = self._get_client()
         
         try:
-            # Scroll through all points to get unique sources
-            sources = set()
-            offset = None
-            limit = 100
+            # The TTL is a hard upper bound; within it a changed point count
+            # (e.g. a write from another process) invalidates the entry early
+            cached = self._indexed_files_cache.get(collection_name)
+            now = time.monotonic()
+            if cached is not None and now - cached[0] >= _CACHE_TTL_SECONDS:
+                cached = None
             
-            while True:
-                result = client.scroll(
-                    collection_name=collection_name,
-                    scroll_filter=None,
-                    limit=limit,
-                    offset=offset,
-                    with_payload=True,
-                    with_vectors=False
-                )
-                
-                points, next_offset = result
-                
-                for point in points:
-                    if point.payload and 'source' in point.payload:
-                        sources.add(point.payload['source'])
-                
-                if next_offset is None:
-                    break
-                offset = next_offset
+            count = await asyncio.to_thread(client.count, collection_name, exact=False)
+            if cached is not None and cached[1] == count.count:
+                return list(cached[2])
+            
+            # Distinct values from the source index when the server supports
+            # facets, otherwise collect them by scrolling every point
+            sources = await self._facet_sources(client, collection_name)
+            if sources is None:
+                sources = await self._scroll_sources(client, collection_name)
             
-            return list(sources)
+            result = list(sources)
+            self._indexed_files_cache[collection_name] = (now, count.count, result)
+            return list(result)
             
         except Exception as e:
             print(f"Error getting indexed files: {e}")
             return []
     
+    async def _facet_sources(self, client: QdrantClient, collection_name: str) -> Optional[set]:
+        """
+        Distinct source values via the facet API (Qdrant 1.12+)
+        Returns None when facets are unavailable or the result may be truncated
+        """
+        facet = getattr(client, "facet", None)
+        if facet is None or self._is_local():
+            return None
+        try:
+            response = await asyncio.to_thread(
+                facet,
+                collection_name=collection_name,
+                key="source",
+                limit=_FACET_LIMIT,
+                exact=True
+            )
+        except Exception:
+            # Older server or no index on source
+            return None
+        if len(response.hits) >= _FACET_LIMIT:
+            return None
+        return {hit.value for hit in response.hits}
+    
+    async def _scroll_sources(self, client: QdrantClient, collection_name: str) -> set:
+        """Distinct source values by scrolling the whole collection"""
+        def fetch_page(offset):
+            # Only the source field is needed, skip the rest of the payload
+            return client.scroll(
+                collection_name=collection_name,
+                scroll_filter=None,
+                limit=_SCROLL_PAGE_SIZE,
+                offset=offset,
+                with_payload=["source"],
+                with_vectors=False
+            )
+        
+        # Scroll through all points to get unique sources
+        sources = set()
+        points, next_offset = await asyncio.to_thread(fetch_page, None)
+        
+        while True:
+            # Request the next page before consuming the current one
+            next_page = None
+            if next_offset is not None:
+                next_page = asyncio.ensure_future(asyncio.to_thread(fetch_page, next_offset))
+        
+            sources.update(
+                p.payload["source"] for p in points
+                if p.payload and "source" in p.payload
+            )
+        
+            if next_page is None:
+                break
+            points, next_offset = await next_page
+        
+        return sources
+    
     async def search_vectors(
         self,
         query_vector: List[float],
@@ -244,33 +439,7 @@ class VectorDBClient:
         client = self._get_client()
         
         # Build filter if provided
-        qdrant_filter = None
-        if filter_dict:
-            conditions = []
-            for key, value in filter_dict.items():
-                if isinstance(value, dict):
-                    # Range filter
-                    if "gte" in value or "lte" in value:
-                        conditions.append(
-                            FieldCondition(
-                                key=key,
-                                range=Range(
-                                    gte=value.get("gte"),
-                                    lte=value.get("lte")
-                                )
-                            )
-                        )
-                else:
-                    # Exact match
-                    conditions.append(
-                        FieldCondition(
-                            key=key,
-                            match=MatchValue(value=value)
-                        )
-                    )
-            
-            if conditions:
-                qdrant_filter = Filter(must=conditions)
+        qdrant_filter = _build_filter(filter_dict)
         
         try:
             # Perform search
@@ -280,7 +449,8 @@ class VectorDBClient:
                 limit=top_k,
                 query_filter=qdrant_filter,
                 score_threshold=score_threshold,
-                with_payload=include_payload
+                with_payload=include_payload,
+                search_params=_search_params(top_k)
             )
             
             # Extract results
@@ -314,6 +484,24 @@ class VectorDBClient:
                 "metadata": []
             }
     
+    async def delete_points(self, ids: List[str], collection_name: str = None) -> bool:
+        """Delete points by ID"""
+        collection_name = collection_name or self.config.default_collection
+        
+        try:
+            client = self._get_client()
+            await asyncio.to_thread(
+                client.delete,
+                collection_name=collection_name,
+                points_selector=PointIdsList(points=ids),
+                wait=True
+            )
+            self._invalidate_caches(collection_name)
+            return True
+        except Exception as e:
+            print(f"Error deleting points: {e}")
+            return False
+    
     def delete_collection(self, collection_name: str = None) -> bool:
         """Delete a collection"""
         collection_name = collection_name or self.config.default_collection
@@ -322,6 +510,7 @@ class VectorDBClient:
             client = self._get_client()
             client.delete_collection(collection_name)
             self._collections.discard(collection_name)
+            self._invalidate_caches(collection_name)
             return True
         except Exception as e:
             print(f"Error deleting collection: {e}")
@@ -347,12 +536,7 @@ class VectorDBClient:
 
 
 # Singleton instance
-_vector_db_client: Optional[VectorDBClient] = None
-
-
+@functools.cache
 def get_vector_db_client() -> VectorDBClient:
     """Get or create vector database client singleton"""
-    global _vector_db_client
-    if _vector_db_client is None:
-        _vector_db_client = VectorDBClient()
-    return _vector_db_client
\ No newline at end of file
+    return VectorDBClient()
@@ -118,10 +118,18 @@ class CollectionInfoTool(Tool):
                 
                 display = f"**File Index Status in '{collection_name}'**\n\n"
                 
+                # Normalize indexed paths once: exact lookups via a set, substring
+                # matches via one newline-joined string (paths never contain newlines)
+                norm_indexed = [f.replace('\\', '/').lower() for f in indexed_files]
+                indexed_set = set(norm_indexed)
+                indexed_text = "\n".join(norm_indexed)
+                
                 for file_path in files_to_check:
                     # Normalize path for comparison
                     normalized = file_path.replace('\\', '/').lower()
-                    is_indexed = any(normalized in f.replace('\\', '/').lower() for f in indexed_files)
+                    is_indexed = normalized in indexed_set or (
+                        bool(norm_indexed) and "\n" not in normalized and normalized in indexed_text
+                    )
                     result["checked_files"][file_path] = is_indexed
                     status = "✓ Indexed" if is_indexed else "✗ Not indexed"
                     display += f"- {file_path}: {status}\n"
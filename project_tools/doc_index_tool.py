@@ -8,8 +8,11 @@ from dbrheo.tools.base import Tool
 from dbrheo.types.tool_types import ToolResult
 from dbrheo.types.core_types import AbortSignal
 import json
+import re
 import hashlib
 import asyncio
+import uuid
+import numpy as np
 from pathlib import Path
 from datetime import datetime
 
@@ -19,6 +22,12 @@ from ._embedding_client import get_embedding_client
 from ._vector_db_client import get_vector_db_client
 from ._content_processor import get_content_processor
 
+# Sentence boundary: terminal punctuation followed by whitespace
+_SENT_SPLIT_RE = re.compile(r'[.!?]\s+')
+
+# Rows per upsert call; bounds the Python objects built for one request
+_UPSERT_SLICE_ROWS = 512
+
 
 class DocIndexTool(Tool):
     """
@@ -36,7 +45,7 @@ class DocIndexTool(Tool):
                 "properties": {
                     "source": {
                         "type": "string",
-                        "description": "Document source: file path, text content, or URL"
+                        "description": "Document source: file or directory path, text content, or URL"
                     },
                     "source_type": {
                         "type": "string",
@@ -124,8 +133,9 @@ class DocIndexTool(Tool):
         collection = params.get("collection_name", "default")
         
         if source_type == "file":
-            source = Path(params.get("source")).name
-            return f"Indexing file '{source}' into collection '{collection}'"
+            path = Path(params.get("source"))
+            kind = "directory" if path.is_dir() else "file"
+            return f"Indexing {kind} '{path.name}' into collection '{collection}'"
         elif source_type == "url":
             return f"Indexing URL content into collection '{collection}'"
         else:
@@ -147,6 +157,9 @@ class DocIndexTool(Tool):
     ) -> ToolResult:
         """Execute document indexing"""
         try:
+            if params.get("source_type") == "file" and Path(params.get("source")).is_dir():
+                return await self._index_directory(params, update_output)
+            
             # 1. Load content
             if update_output:
                 update_output("Loading document content...")
@@ -157,15 +170,10 @@ class DocIndexTool(Tool):
                 update_output("Splitting document into chunks...")
             chunks = self._split_chunks(content, params)
             
-            # 3. Generate embeddings
+            # 3-4. Generate embeddings and store them, group by group
             if update_output:
                 update_output(f"Generating embeddings for {len(chunks)} chunks...")
-            embeddings = await self._generate_embeddings(chunks)
-            
-            # 4. Store in vector database
-            if update_output:
-                update_output("Storing vectors in database...")
-            doc_id = await self._store_vectors(chunks, embeddings, params)
+            doc_id = await self._embed_and_store(chunks, params)
             
             # Prepare result
             result = {
@@ -191,6 +199,54 @@ class DocIndexTool(Tool):
                 error=str(e)
             )
     
+    async def _index_directory(self, params: Dict[str, Any], update_output: Optional[Any] = None) -> ToolResult:
+        """
+        Index every file under a directory, one document per file
+        Files are extracted in concurrent batches, CPU-bound formats in worker processes
+        """
+        doc_ids = {}
+        chunk_count = 0
+        chunk_chars = 0
+        
+        if update_output:
+            update_output("Loading directory content...")
+        batches = self.content_processor.walk_and_process(
+            params["source"], **params.get("process_options", {})
+        )
+        async for batch in batches:
+            for content, metadata in batch:
+                if not content.strip():
+                    continue
+                file_params = {
+                    **params,
+                    "source": metadata["source"],
+                    "metadata": {**params.get("metadata", {}), **metadata}
+                }
+                chunks = self._split_chunks(content, file_params)
+                if update_output:
+                    update_output(f"Indexing {Path(metadata['source']).name} ({len(chunks)} chunks)...")
+                doc_ids[metadata["source"]] = await self._embed_and_store(chunks, file_params)
+                chunk_count += len(chunks)
+                chunk_chars += sum(map(len, chunks))
+        
+        strategy = params.get("chunk_strategy", "auto")
+        avg_size = chunk_chars // chunk_count if chunk_count else 0
+        result = {
+            "indexed_files": len(doc_ids),
+            "indexed_chunks": chunk_count,
+            "collection_name": params.get("collection_name", "default"),
+            "doc_ids": doc_ids,
+            "status": "success",
+            "details": f"Used {strategy} strategy, average chunk size {avg_size} chars"
+        }
+        
+        return ToolResult(
+            summary=f"Successfully indexed {chunk_count} chunks from {len(doc_ids)} files",
+            llm_content=json.dumps(result, indent=2),
+            return_display=self._format_display(result),
+            error=None
+        )
+    
     async def _load_content(self, params: Dict[str, Any]) -> str:
         """Load content from source using flexible processor"""
         source_type = params.get("source_type")
@@ -227,77 +283,160 @@ class DocIndexTool(Tool):
         chunks = []
         
         if strategy == "paragraph":
-            # Split by double newline
-            paragraphs = content.split("\n\n")
-            chunks = [p.strip() for p in paragraphs if p.strip()]
+            # Split by double newline, stripping each paragraph once
+            chunks = [p for p in map(str.strip, content.split("\n\n")) if p]
         elif strategy == "fixed":
-            # Fixed size chunks with overlap
-            text_len = len(content)
-            start = 0
-            while start < text_len:
-                end = min(start + chunk_size, text_len)
-                chunks.append(content[start:end])
-                start = end - overlap if end < text_len else text_len
+            # Fixed size chunks with overlap; a chunk starts every
+            # chunk_size - overlap chars until one reaches the end
+            step = max(chunk_size - overlap, 1)
+            starts = range(0, max(len(content) - overlap, 1), step)
+            chunks = [content[start:start + chunk_size] for start in starts]
         elif strategy == "sentence":
             # Simple sentence splitting
-            import re
-            sentences = re.split(r'[.!?]\s+', content)
-            current_chunk = ""
+            sentences = _SENT_SPLIT_RE.split(content)
+            # Collect pieces and join once per chunk instead of growing a str
+            pieces = []
+            pieces_len = 0
             for sentence in sentences:
-                if len(current_chunk) + len(sentence) < chunk_size:
-                    current_chunk += sentence + ". "
+                if pieces_len + len(sentence) < chunk_size:
+                    pieces.append(sentence)
+                    pieces.append(". ")
+                    pieces_len += len(sentence) + 2
                 else:
-                    if current_chunk:
-                        chunks.append(current_chunk.strip())
-                    current_chunk = sentence + ". "
-            if current_chunk:
-                chunks.append(current_chunk.strip())
+                    if pieces:
+                        chunks.append("".join(pieces).strip())
+                    pieces = [sentence, ". "]
+                    pieces_len = len(sentence) + 2
+            if pieces:
+                chunks.append("".join(pieces).strip())
         
         return chunks if chunks else [content]
     
-    async def _generate_embeddings(self, chunks: List[str]) -> List[List[float]]:
-        """Generate embeddings for chunks"""
+    async def _embed_and_store(self, chunks: List[str], params: Dict[str, Any]) -> str:
+        """
+        Embed and store chunks as a two-stage pipeline
+        Each group is upserted while the next one is still being embedded
+        """
+        doc_id = self._make_doc_id(chunks)
+        # One group fills every concurrent embedding request once
+        group_size = max(self.rag_config.batch_size * self.rag_config.max_concurrent_requests, 1)
+        queue = asyncio.Queue(maxsize=2)
+        
+        async def produce():
+            try:
+                for start in range(0, len(chunks), group_size):
+                    group = chunks[start:start + group_size]
+                    await queue.put((start, group, await self._generate_embeddings(group)))
+            except Exception:
+                # Wake the consumer so it can surface the failure
+                await queue.put(None)
+                raise
+            # Only sent while the consumer is still draining; a cancelled
+            # producer must not block on a full queue
+            await queue.put(None)
+        
+        # IDs of every point written so far, so a failure can undo them
+        written_ids: List[str] = []
+        producer = asyncio.create_task(produce())
+        try:
+            while (item := await queue.get()) is not None:
+                start, group, embeddings = item
+                await self._store_vectors(
+                    group, embeddings, params, doc_id, start, len(chunks), written_ids
+                )
+            # Re-raise an embedding failure that ended the pipeline early
+            await producer
+        except BaseException:
+            # Stop embedding and reap the producer, then remove the groups
+            # already stored so the document isn't left half-indexed
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+            if written_ids:
+                await self.vector_db.delete_points(
+                    written_ids, params.get("collection_name", "default")
+                )
+            raise
+        
+        return doc_id
+    
+    async def _generate_embeddings(self, chunks: List[str]) -> np.ndarray:
+        """Generate embeddings for chunks as a (N, D) float32 array"""
+        # Embed each distinct chunk once; repeats map to the first occurrence
+        slots = {}
+        positions = [slots.setdefault(chunk, len(slots)) for chunk in chunks]
+        
         # Use Gemini embedding client
-        embeddings = await self.embedding_client.embed_batch(chunks)
+        embeddings = await self.embedding_client.embed_batch(list(slots))
+        # One contiguous buffer instead of N lists of boxed floats
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if len(slots) < len(chunks):
+            embeddings = embeddings[positions]
         return embeddings
     
+    def _make_doc_id(self, chunks: List[str]) -> str:
+        """Generate document ID from the chunk contents"""
+        # Hash chunk by chunk instead of joining them first
+        # (same digest as hashing the joined text)
+        hasher = hashlib.md5()
+        for chunk in chunks:
+            hasher.update(chunk.encode())
+        return hasher.hexdigest()[:12]
+    
     async def _store_vectors(
         self, 
         chunks: List[str], 
-        embeddings: List[List[float]], 
-        params: Dict[str, Any]
-    ) -> str:
-        """Store vectors in database"""
+        embeddings: np.ndarray, 
+        params: Dict[str, Any],
+        doc_id: str,
+        offset: int = 0,
+        total_chunks: Optional[int] = None,
+        written_ids: Optional[List[str]] = None
+    ) -> int:
+        """
+        Store vectors in database, chunks being a slice starting at offset
+        Point IDs are appended to written_ids before each upsert when given
+        """
         collection_name = params.get("collection_name", "default")
         base_metadata = params.get("metadata", {})
+        total_chunks = len(chunks) if total_chunks is None else total_chunks
+        # Fields shared by every chunk, computed once
+        timestamp = datetime.now().isoformat()
+        source = params.get("source")
+        source_type = params.get("source_type")
         
-        # Generate document ID
-        doc_content = "".join(chunks)
-        doc_id = hashlib.md5(doc_content.encode()).hexdigest()[:12]
-        
-        # Prepare metadata for each chunk
-        metadata_list = []
-        for i, chunk in enumerate(chunks):
-            chunk_metadata = base_metadata.copy()
-            chunk_metadata.update({
-                "doc_id": doc_id,
-                "chunk_index": i,
-                "total_chunks": len(chunks),
-                "timestamp": datetime.now().isoformat(),
-                "source": params.get("source"),
-                "source_type": params.get("source_type")
-            })
-            metadata_list.append(chunk_metadata)
-        
-        # Store in vector database
-        count = await self.vector_db.upsert_vectors(
-            vectors=embeddings,
-            documents=chunks,
-            metadata=metadata_list,
-            collection_name=collection_name
-        )
+        count = 0
+        for start in range(0, len(chunks), _UPSERT_SLICE_ROWS):
+            end = start + _UPSERT_SLICE_ROWS
+            
+            # Prepare metadata for each chunk
+            metadata_list = [
+                {
+                    **base_metadata,
+                    "doc_id": doc_id,
+                    "chunk_index": i,
+                    "total_chunks": total_chunks,
+                    "timestamp": timestamp,
+                    "source": source,
+                    "source_type": source_type
+                }
+                for i in range(offset + start, offset + min(end, len(chunks)))
+            ]
+            
+            ids = [str(uuid.uuid4()) for _ in metadata_list]
+            if written_ids is not None:
+                # Recorded first: a failed upsert may still have written some points
+                written_ids.extend(ids)
+            
+            # Store in vector database, one slice at a time
+            count += await self.vector_db.upsert_vectors(
+                vectors=embeddings[start:end],
+                documents=chunks[start:end],
+                metadata=metadata_list,
+                collection_name=collection_name,
+                ids=ids
+            )
         
-        return doc_id
+        return count
     
     def _get_indexing_details(self, chunks: List[str], params: Dict[str, Any]) -> str:
         """Get indexing details for result"""
@@ -308,11 +447,15 @@ class DocIndexTool(Tool):
     
     def _format_display(self, result: Dict[str, Any]) -> str:
         """Format result for display"""
+        if "doc_ids" in result:
+            documents = f"- **Files Indexed:** {result['indexed_files']}"
+        else:
+            documents = f"- **Document ID:** {result['doc_id']}"
         return f"""**Document Indexing Complete**
 
 - **Chunks Indexed:** {result['indexed_chunks']}
 - **Collection:** {result['collection_name']}
-- **Document ID:** {result['doc_id']}
+{documents}
 - **Details:** {result['details']}
 """
 
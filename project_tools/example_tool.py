@@ -4,6 +4,7 @@ A simple demonstration of how to create custom tools for your project
 This example shows a timestamp tool, but you can create any tool you need
 """
 
+import time
 from datetime import datetime, timezone
 from typing import Dict, Any, Optional
 from dbrheo.tools.base import Tool
@@ -11,6 +12,20 @@ from dbrheo.types.tool_types import ToolResult
 from dbrheo.types.core_types import AbortSignal
 
 
+def _now(tz: str) -> datetime:
+    """Current time, timezone-aware only for UTC"""
+    return datetime.now(timezone.utc) if tz == "UTC" else datetime.now()
+
+
+# Preset output formats by the "format" parameter, called with the timezone
+_FORMATTERS = {
+    # Unix time doesn't depend on the timezone, no datetime needed
+    "unix": lambda tz: str(int(time.time())),
+    "iso": lambda tz: _now(tz).isoformat(),
+    "human": lambda tz: _now(tz).strftime("%Y-%m-%d %H:%M:%S"),
+}
+
+
 class TimestampTool(Tool):
     """
     A simple tool to get current timestamp or format dates
@@ -46,10 +61,9 @@ class TimestampTool(Tool):
     def validate_tool_params(self, params: Dict[str, Any]) -> Optional[str]:
         """Validate parameters"""
         format_type = params.get("format", "iso")
-        valid_formats = ["unix", "iso", "human"]
         
         # Check if it's a valid preset or a custom strftime format
-        if format_type not in valid_formats and "%" not in format_type:
+        if format_type not in _FORMATTERS and "%" not in format_type:
             return f"Invalid format. Use 'unix', 'iso', 'human', or a strftime format string"
         
         return None
@@ -78,23 +92,14 @@ class TimestampTool(Tool):
             format_type = params.get("format", "iso")
             tz = params.get("timezone", "local")
             
-            # Get current time
-            if tz == "UTC":
-                now = datetime.now(timezone.utc)
-            else:
-                now = datetime.now()
-            
-            # Format the timestamp
-            if format_type == "unix":
-                result = str(int(now.timestamp()))
-            elif format_type == "iso":
-                result = now.isoformat()
-            elif format_type == "human":
-                result = now.strftime("%Y-%m-%d %H:%M:%S")
+            # Format the current time
+            formatter = _FORMATTERS.get(format_type)
+            if formatter is not None:
+                result = formatter(tz)
             elif "%" in format_type:
                 # Custom strftime format
                 try:
-                    result = now.strftime(format_type)
+                    result = _now(tz).strftime(format_type)
                 except Exception as e:
                     return ToolResult(
                         summary=f"Invalid format: {str(e)}",
@@ -103,7 +108,7 @@ class TimestampTool(Tool):
                         error=f"Format error: {str(e)}"
                     )
             else:
-                result = now.isoformat()
+                result = _now(tz).isoformat()
             
             return ToolResult(
                 summary=f"Got timestamp: {result}",
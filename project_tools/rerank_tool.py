@@ -8,7 +8,6 @@ from dbrheo.tools.base import Tool
 from dbrheo.types.tool_types import ToolResult
 from dbrheo.types.core_types import AbortSignal
 import json
-import asyncio
 
 # Import reranker client
 from ._rag_config import get_config
@@ -185,13 +184,8 @@ class RerankTool(Tool):
         threshold: Optional[float]
     ) -> Dict[str, Any]:
         """Perform actual reranking using Qwen3-Reranker-8B"""
-        # Run reranking in thread pool to avoid blocking
-        loop = asyncio.get_event_loop()
-        
-        # Call the synchronous reranker in a thread
-        doc_scores = await loop.run_in_executor(
-            None,
-            self.reranker_client.rerank,
+        # Runs on the reranker's dedicated thread to avoid blocking
+        doc_scores = await self.reranker_client.arerank(
             query,
             documents,
             top_k,
@@ -233,34 +227,32 @@ class RerankTool(Tool):
     
     def _format_display(self, result: Dict[str, Any]) -> str:
         """Format results for display"""
-        display = "**Reranked Documents**\n\n"
+        parts = ["**Reranked Documents**\n\n"]
         
         documents = result.get("documents", [])
         scores = result.get("scores", [])
         filtered = result.get("filtered_count", 0)
         
         if filtered > 0:
-            display += f"*Note: {filtered} documents filtered by threshold*\n\n"
+            parts.append(f"*Note: {filtered} documents filtered by threshold*\n\n")
         
         for i, doc in enumerate(documents):
-            display += f"### Rank {i + 1}"
+            if i:
+                parts.append("---\n\n")
+            
+            parts.append(f"### Rank {i + 1}")
             
             # Add score if available
             if scores and i < len(scores):
-                display += f" (Relevance: {scores[i]:.3f})"
-            
-            display += "\n\n"
+                parts.append(f" (Relevance: {scores[i]:.3f})")
             
             # Add document content (truncate if too long)
-            if len(doc) > 500:
-                display += doc[:497] + "...\n\n"
-            else:
-                display += doc + "\n\n"
-            
-            if i < len(documents) - 1:
-                display += "---\n\n"
+            parts.append("\n\n")
+            parts.append(doc[:497] + "..." if len(doc) > 500 else doc)
+            parts.append("\n\n")
         
-        return display
+        # Joined once instead of growing one string per piece
+        return "".join(parts)
 
 
 # Export the tool class for auto-registration
@@ -3,18 +3,148 @@ Vector Search Tool for Agentic RAG
 Performs semantic search in vector database
 """
 
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Callable, Iterator, Optional, List
 from dbrheo.tools.base import Tool
 from dbrheo.types.tool_types import ToolResult
 from dbrheo.types.core_types import AbortSignal
 import json
 import asyncio
+from collections import OrderedDict
+from itertools import chain, repeat
+
+# Optional accelerated JSON encoder
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Import RAG components (private modules)
 from ._rag_config import get_config
 from ._embedding_client import get_embedding_client
 from ._vector_db_client import get_vector_db_client
 
+# Process-wide LRU of query embeddings keyed by whitespace-normalized text
+_QUERY_CACHE_SIZE = 4096
+_QUERY_CACHE: "OrderedDict[str, tuple]" = OrderedDict()
+
+# Defaults for optional search parameters, matching the schema
+_PARAM_DEFAULTS = {
+    "query": None,
+    "collection_name": "default",
+    "top_k": 5,
+    "filter": None,
+    "score_threshold": None,
+    "include_metadata": True,
+}
+
+# Result text size above which formatting runs in a worker thread
+_OFFLOAD_MIN_CHARS = 4096
+
+# Documents longer than this are cut to fit the display, ellipsis included
+_DISPLAY_MAX_CHARS = 500
+_DISPLAY_KEEP_CHARS = _DISPLAY_MAX_CHARS - 3
+
+# Bound formatters for the per-result display pieces
+_HEADER_FMT = "### Result {}".format
+_SCORE_FMT = " (Score: {:.3f})".format
+_SOURCE_FMT = "*Source: {}*\n\n".format
+
+
+def _to_json(obj: Any) -> str:
+    """Serialize results as indented JSON, using orjson when installed"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY).decode()
+        except TypeError:
+            pass  # Types orjson rejects, e.g. non-str keys
+    return json.dumps(obj, indent=2)
+
+
+# No-hit results by whether metadata is included, serialized once
+_EMPTY_RESULTS = {
+    True: {"documents": [], "scores": [], "query_used": "", "metadata": []},
+    False: {"documents": [], "scores": [], "query_used": ""},
+}
+_EMPTY_LLM_CONTENT = {key: _to_json(value) for key, value in _EMPTY_RESULTS.items()}
+
+
+class _QueryBatcher:
+    """
+    Coalesces query embeddings requested within a short window
+    into one batched embedding call
+    """
+    
+    def __init__(self, embedding_client, max_batch: int = 32, max_wait: float = 0.01, max_in_flight: int = 4):
+        self.embedding_client = embedding_client
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_in_flight = max_in_flight
+        # Queue, semaphore and worker belong to one event loop
+        self._loop = None
+        self._queue = None
+        self._slots = None
+        self._tasks = set()
+    
+    async def submit(self, query: str) -> List[float]:
+        """Embed one query as part of the next batch"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            self._spawn(self._run())
+        
+        future = loop.create_future()
+        self._queue.put_nowait((query, future))
+        return await future
+    
+    def _spawn(self, coro):
+        """Start a task, keeping a reference until it finishes"""
+        task = self._loop.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self):
+        """Drain the queue into batches of up to max_batch queries"""
+        while True:
+            batch = [await self._queue.get()]
+            # A lone query goes out at once; otherwise give concurrent
+            # searches the window to join this batch
+            if not self._queue.empty():
+                await asyncio.sleep(self.max_wait)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            
+            await self._slots.acquire()
+            self._spawn(self._dispatch(batch))
+    
+    async def _dispatch(self, batch: List[tuple]):
+        """Embed one batch and resolve its waiters"""
+        try:
+            embeddings = await self.embedding_client.aembed_queries([query for query, _ in batch])
+            if len(embeddings) != len(batch):
+                raise ValueError(f"Expected {len(batch)} query embeddings, got {len(embeddings)}")
+            for (_, future), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._slots.release()
+
+
+_BATCHER: Optional[_QueryBatcher] = None
+
+
+def _get_batcher(embedding_client) -> _QueryBatcher:
+    """Get or create the query batcher singleton"""
+    global _BATCHER
+    if _BATCHER is None:
+        _BATCHER = _QueryBatcher(embedding_client)
+    return _BATCHER
+
 
 class VectorSearchTool(Tool):
     """
@@ -22,6 +152,10 @@ class VectorSearchTool(Tool):
     Returns semantically similar documents from vector database
     """
     
+    # Query embedding cache counters, shared by all instances
+    cache_hits = 0
+    cache_misses = 0
+    
     def __init__(self, config, i18n=None):
         super().__init__(
             name="vector_search",
@@ -65,30 +199,28 @@ class VectorSearchTool(Tool):
                 "required": ["query"]
             },
             is_output_markdown=True,
-            can_update_output=False
+            can_update_output=True
         )
         self.config = config
         self._init_components()
     
     def _init_components(self):
         """Initialize embedding model and vector database client"""
+        # Resolved per instance so a new tool picks up reset_config();
+        # the getters return shared singletons, so this stays cheap
         self.rag_config = get_config()
         self.embedding_client = get_embedding_client()
         self.vector_db = get_vector_db_client()
     
     def validate_tool_params(self, params: Dict[str, Any]) -> Optional[str]:
-        """Validate search parameters"""
-        query = params.get("query")
-        
-        if not query or not query.strip():
+        """Validate search parameters, stopping at the first error"""
+        if not (query := params.get("query")) or not query.strip():
             return "Query cannot be empty"
         
-        top_k = params.get("top_k", 5)
-        if top_k < 1 or top_k > 20:
+        if not 1 <= params.get("top_k", 5) <= 20:
             return "top_k must be between 1 and 20"
         
-        threshold = params.get("score_threshold")
-        if threshold is not None and (threshold < 0 or threshold > 1):
+        if (threshold := params.get("score_threshold")) is not None and not 0 <= threshold <= 1:
             return "score_threshold must be between 0 and 1"
         
         return None
@@ -121,9 +253,11 @@ class VectorSearchTool(Tool):
     ) -> ToolResult:
         """Execute vector search"""
         try:
-            query = params.get("query")
-            collection_name = params.get("collection_name", "default")
-            top_k = params.get("top_k", 5)
+            # Fill in defaults once instead of a .get() per parameter
+            params = {**_PARAM_DEFAULTS, **params}
+            query = params["query"]
+            collection_name = params["collection_name"]
+            top_k = params["top_k"]
             
             # 1. Generate query embedding
             query_embedding = await self._embed_query(query)
@@ -133,29 +267,52 @@ class VectorSearchTool(Tool):
                 query_embedding,
                 collection_name,
                 top_k,
-                params.get("filter"),
-                params.get("score_threshold")
+                params["filter"],
+                params["score_threshold"]
             )
             
             # 3. Format results
             formatted_results = self._format_results(
                 search_results,
-                params.get("include_metadata", True)
+                params["include_metadata"]
             )
             
             # Check if results are empty
             if not formatted_results["documents"]:
+                key = "metadata" in formatted_results
                 return ToolResult(
                     summary="No matching documents found",
-                    llm_content=json.dumps(formatted_results, indent=2),
+                    llm_content=_EMPTY_LLM_CONTENT[key]
+                    if formatted_results == _EMPTY_RESULTS[key]
+                    else _to_json(formatted_results),
                     return_display="No documents found matching your query.",
                     error=None
                 )
             
+            # Serializing large result sets takes long enough to stall
+            # other searches, so it moves to a worker thread
+            offload = sum(map(len, formatted_results["documents"])) > _OFFLOAD_MIN_CHARS
+            if update_output:
+                # Show each hit as soon as it is formatted; large JSON is
+                # serialized in a worker thread meanwhile
+                json_task = asyncio.ensure_future(
+                    asyncio.to_thread(_to_json, formatted_results)
+                ) if offload else None
+                display = self._format_display(formatted_results, on_block=update_output)
+                llm_content = await json_task if json_task else _to_json(formatted_results)
+            elif offload:
+                llm_content, display = await asyncio.gather(
+                    asyncio.to_thread(_to_json, formatted_results),
+                    asyncio.to_thread(self._format_display, formatted_results)
+                )
+            else:
+                llm_content = _to_json(formatted_results)
+                display = self._format_display(formatted_results)
+            
             return ToolResult(
                 summary=f"Found {len(formatted_results['documents'])} relevant documents",
-                llm_content=json.dumps(formatted_results, indent=2),
-                return_display=self._format_display(formatted_results),
+                llm_content=llm_content,
+                return_display=display,
                 error=None
             )
             
@@ -168,10 +325,24 @@ class VectorSearchTool(Tool):
             )
     
     async def _embed_query(self, query: str) -> List[float]:
-        """Generate embedding for query"""
-        # Use synchronous method for query embedding
+        """Generate embedding for query, reusing cached embeddings of repeated queries"""
+        key = " ".join(query.split())
+        cached = _QUERY_CACHE.get(key)
+        if cached is not None:
+            _QUERY_CACHE.move_to_end(key)
+            VectorSearchTool.cache_hits += 1
+            return list(cached)
+        VectorSearchTool.cache_misses += 1
+        
+        # Concurrent searches share one batched request
         # Uses 'retrieval_query' task type for better results
-        embedding = self.embedding_client.embed_query(query)
+        embedding = await _get_batcher(self.embedding_client).submit(query)
+        
+        # A failed call comes back as a zero vector; don't keep it
+        if any(embedding):
+            _QUERY_CACHE[key] = tuple(embedding)
+            if len(_QUERY_CACHE) > _QUERY_CACHE_SIZE:
+                _QUERY_CACHE.popitem(last=False)
         return embedding
     
     async def _search_vectors(
@@ -212,38 +383,50 @@ class VectorSearchTool(Tool):
         
         return formatted
     
-    def _format_display(self, results: Dict[str, Any]) -> str:
-        """Format results for display"""
-        display = "**Search Results**\n\n"
+    def _format_display(
+        self,
+        results: Dict[str, Any],
+        on_block: Optional[Callable[[str], None]] = None
+    ) -> str:
+        """Format results for display, passing each result block to on_block as it is built"""
+        parts = ["**Search Results**\n\n"]
+        for block in self._iter_display(results):
+            if on_block:
+                on_block(block)
+            parts.append(block)
+            parts.append("---\n\n")
         
+        # Joined once instead of growing one string per piece
+        return "".join(parts).rstrip("---\n\n")
+    
+    def _iter_display(self, results: Dict[str, Any]) -> Iterator[str]:
+        """Yield the display block of each result in rank order"""
         documents = results.get("documents", [])
-        scores = results.get("scores", [])
-        metadata = results.get("metadata", [])
+        # Scores and metadata may be shorter than documents; pad with None
+        scores = chain(results.get("scores") or (), repeat(None))
+        metadata = chain(results.get("metadata") or (), repeat(None))
         
-        for i, doc in enumerate(documents):
-            display += f"### Result {i + 1}"
+        for i, (doc, score, meta) in enumerate(zip(documents, scores, metadata), 1):
+            parts = [_HEADER_FMT(i)]
             
             # Add score if available
-            if i < len(scores):
-                display += f" (Score: {scores[i]:.3f})"
+            if score is not None:
+                parts.append(_SCORE_FMT(score))
             
-            display += "\n\n"
+            parts.append("\n\n")
             
             # Add metadata if available
-            if metadata and i < len(metadata):
-                meta = metadata[i]
-                if meta:
-                    display += f"*Source: {meta.get('source', 'Unknown')}*\n\n"
+            if meta:
+                parts.append(_SOURCE_FMT(meta.get('source', 'Unknown')))
             
             # Add document content (truncate if too long)
-            if len(doc) > 500:
-                display += doc[:497] + "...\n\n"
+            if len(doc) > _DISPLAY_MAX_CHARS:
+                parts.append(f"{doc[:_DISPLAY_KEEP_CHARS]}...\n\n")
             else:
-                display += doc + "\n\n"
+                parts.append(doc)
+                parts.append("\n\n")
             
-            display += "---\n\n"
-        
-        return display.rstrip("---\n\n")
+            yield "".join(parts)
 
 
 # Export the tool class for auto-registration
@@ -0,0 +1,9 @@
+"""
+Shared pytest setup for project_tools tests
+"""
+
+import sys
+from pathlib import Path
+
+# project_tools lives at the repository root, next to this directory
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,71 @@
+"""
+Tests for structured-file normalisation in the content processor
+"""
+
+import asyncio
+from pathlib import Path
+
+from project_tools._content_processor import ContentProcessor, _normalize_structured
+
+ENTITY_BOMB = (
+    b'<?xml version="1.0"?>'
+    b'<!DOCTYPE r [<!ENTITY a "aaaaaaaaaa"><!ENTITY b "&a;&a;&a;&a;&a;&a;&a;&a;">]>'
+    b'<r>&b;</r>'
+)
+EXTERNAL_ENTITY = (
+    b'<?xml version="1.0"?>'
+    b'<!DOCTYPE r [<!ENTITY e SYSTEM "file:///etc/passwd">]>'
+    b'<r>&e;</r>'
+)
+
+
+def test_xml_entities_are_not_expanded():
+    for raw in (ENTITY_BOMB, EXTERNAL_ENTITY):
+        normalized = _normalize_structured(raw, raw.decode(), ".xml") or ""
+        assert "aaaaaaaaaa" not in normalized
+        assert "root:" not in normalized
+
+
+def test_json_is_compacted():
+    assert _normalize_structured(b"", '{"a": [1, 2]}', ".json") == '{"a":[1,2]}'
+
+
+def test_normalization_is_opt_in(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text('{"a": [1, 2]}')
+    processor = ContentProcessor()
+
+    metadata = {"extension": ".json"}
+    assert asyncio.run(processor._process_text(str(path), metadata)) == '{"a": [1, 2]}'
+    assert "normalized" not in metadata
+
+    metadata = {"extension": ".json"}
+    content = asyncio.run(processor._process_text(str(path), metadata, normalize_structured=True))
+    assert content == '{"a":[1,2]}'
+    assert metadata["normalized"] is True
+
+
+def test_known_extensions_report_mime_type(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("hello")
+
+    content, metadata = asyncio.run(ContentProcessor()._process_file(str(path)))
+
+    assert content == "hello"
+    assert metadata["mime_type"] == "text/plain"
+
+
+def test_walk_yields_text_metadata_pairs_for_every_file(tmp_path):
+    (tmp_path / "notes.txt").write_text("plain text")
+    (tmp_path / "sub").mkdir()
+    # Sniffed as PDF, fails to parse and goes through the fallback reader
+    (tmp_path / "sub" / "data.unknownext").write_bytes(b"%PDF-1.4 truncated")
+
+    async def collect():
+        return [item async for batch in ContentProcessor().walk_and_process(str(tmp_path)) for item in batch]
+
+    results = asyncio.run(collect())
+
+    assert len(results) == 2
+    assert all(isinstance(content, str) and isinstance(metadata, dict) for content, metadata in results)
+    assert {Path(metadata["source"]).name for _, metadata in results} == {"notes.txt", "data.unknownext"}
@@ -0,0 +1,148 @@
+"""
+Tests for the embed/store pipeline in DocIndexTool
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from project_tools._content_processor import ContentProcessor
+from project_tools._rag_config import RAGConfig
+from project_tools._vector_db_client import VectorDBClient
+from project_tools.doc_index_tool import DocIndexTool
+
+
+class FakeEmbeddingClient:
+    def __init__(self, fail_after=None):
+        self.calls = 0
+        self.fail_after = fail_after
+
+    async def embed_batch(self, texts):
+        self.calls += 1
+        await asyncio.sleep(0)
+        if self.fail_after is not None and self.calls > self.fail_after:
+            raise RuntimeError("embedding failed")
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+class FakeVectorDB:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.points = {}
+
+    @property
+    def metadata(self):
+        return list(self.points.values())
+
+    async def upsert_vectors(self, vectors, documents, metadata, collection_name, ids):
+        if self.fail:
+            # Give the producer time to fill the queue before failing
+            await asyncio.sleep(0.05)
+            raise RuntimeError("upsert failed")
+        await asyncio.sleep(0)
+        self.points.update(zip(ids, metadata))
+        return len(vectors)
+
+    async def delete_points(self, ids, collection_name):
+        for point_id in ids:
+            self.points.pop(point_id, None)
+        return True
+
+
+def make_tool(embedding_client, vector_db):
+    tool = DocIndexTool.__new__(DocIndexTool)
+    tool.rag_config = SimpleNamespace(batch_size=2, max_concurrent_requests=1)
+    tool.embedding_client = embedding_client
+    tool.vector_db = vector_db
+    return tool
+
+
+CHUNKS = [f"chunk {i}" for i in range(20)]
+PARAMS = {"source": "doc.txt", "source_type": "text"}
+
+
+async def run_pipeline(tool):
+    # Bounded so a deadlocked pipeline fails the test instead of hanging it
+    doc_id = await asyncio.wait_for(tool._embed_and_store(CHUNKS, PARAMS), timeout=5)
+    pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+    return doc_id, pending
+
+
+def test_pipeline_stores_every_chunk_in_order():
+    vector_db = FakeVectorDB()
+    tool = make_tool(FakeEmbeddingClient(), vector_db)
+
+    doc_id, pending = asyncio.run(run_pipeline(tool))
+
+    assert doc_id == tool._make_doc_id(CHUNKS)
+    assert [m["chunk_index"] for m in vector_db.metadata] == list(range(len(CHUNKS)))
+    assert pending == []
+
+
+def test_store_failure_propagates_without_hanging():
+    tool = make_tool(FakeEmbeddingClient(), FakeVectorDB(fail=True))
+
+    async def main():
+        with pytest.raises(RuntimeError, match="upsert failed"):
+            await run_pipeline(tool)
+        return [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+    # The producer must be reaped, not left pending
+    assert asyncio.run(main()) == []
+
+
+def test_embedding_failure_propagates_and_removes_stored_groups():
+    vector_db = FakeVectorDB()
+    tool = make_tool(FakeEmbeddingClient(fail_after=2), vector_db)
+
+    with pytest.raises(RuntimeError, match="embedding failed"):
+        asyncio.run(run_pipeline(tool))
+    assert vector_db.points == {}
+
+
+def count_points(vector_db, collection_name):
+    return vector_db._get_client().count(collection_name, exact=True).count
+
+
+def test_failure_leaves_no_points_in_qdrant():
+    vector_db = VectorDBClient(RAGConfig(vector_db_type="memory", embedding_dim=2))
+    tool = make_tool(FakeEmbeddingClient(fail_after=1), vector_db)
+
+    # The first group is stored before the second one fails to embed
+    with pytest.raises(RuntimeError, match="embedding failed"):
+        asyncio.run(run_pipeline(tool))
+    assert count_points(vector_db, "default") == 0
+    assert asyncio.run(vector_db.get_indexed_files("default")) == []
+
+
+def test_failed_reindex_keeps_the_earlier_copy():
+    vector_db = VectorDBClient(RAGConfig(vector_db_type="memory", embedding_dim=2))
+    asyncio.run(run_pipeline(make_tool(FakeEmbeddingClient(), vector_db)))
+
+    with pytest.raises(RuntimeError, match="embedding failed"):
+        asyncio.run(run_pipeline(make_tool(FakeEmbeddingClient(fail_after=1), vector_db)))
+    # Only the failed run's points are removed, not those of the same doc_id
+    assert count_points(vector_db, "default") == len(CHUNKS)
+
+
+def test_directory_source_indexes_every_file(tmp_path):
+    (tmp_path / "a.txt").write_text("first file\n\nsecond paragraph")
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "nested" / "b.md").write_text("# Title\n\nbody")
+    (tmp_path / "empty.txt").write_text("   ")
+    vector_db = VectorDBClient(RAGConfig(vector_db_type="memory", embedding_dim=2))
+    tool = make_tool(FakeEmbeddingClient(), vector_db)
+    tool.content_processor = ContentProcessor()
+
+    result = asyncio.run(tool.execute(
+        {"source": str(tmp_path), "source_type": "file", "collection_name": "dir"}, None
+    ))
+
+    assert result.error is None
+    assert json.loads(result.llm_content)["indexed_files"] == 2
+    assert sorted(asyncio.run(vector_db.get_indexed_files("dir"))) == sorted(
+        [str(tmp_path / "a.txt"), str(tmp_path / "nested" / "b.md")]
+    )
+    assert count_points(vector_db, "dir") == 4
@@ -0,0 +1,92 @@
+"""
+Tests for the on-disk embedding cache and the client path through it
+"""
+
+import asyncio
+import sqlite3
+from array import array
+
+from project_tools._embedding_cache import EmbeddingCache
+from project_tools._embedding_client import EmbeddingClient
+from project_tools._rag_config import RAGConfig
+
+
+def test_round_trip_survives_reopen(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    key = cache.make_key("hello", "model", 3, "RETRIEVAL_DOCUMENT")
+    cache.set_many([(key, [0.5, -1.25, 2.0])])
+
+    reopened = EmbeddingCache(str(tmp_path))
+    assert reopened.get_many([key, "missing"]) == {key: [0.5, -1.25, 2.0]}
+
+
+def test_vectors_are_stored_as_float32(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    cache.set_many([("k", [0.1])])
+    (value,) = cache.get_many(["k"])["k"]
+    assert value != 0.1
+    assert abs(value - 0.1) < 1e-7
+
+
+def test_lookup_spans_several_chunks(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    items = [(f"k{i}", [float(i)]) for i in range(EmbeddingCache._LOOKUP_CHUNK * 2 + 7)]
+    cache.set_many(items)
+    assert cache.get_many([key for key, _ in items]) == dict(items)
+
+
+def test_key_depends_on_every_component():
+    base = EmbeddingCache.make_key("text", "model", 768, "RETRIEVAL_QUERY")
+    assert base == EmbeddingCache.make_key("text", "model", 768, "RETRIEVAL_QUERY")
+    assert base != EmbeddingCache.make_key("other", "model", 768, "RETRIEVAL_QUERY")
+    assert base != EmbeddingCache.make_key("text", "other", 768, "RETRIEVAL_QUERY")
+    assert base != EmbeddingCache.make_key("text", "model", 512, "RETRIEVAL_QUERY")
+    assert base != EmbeddingCache.make_key("text", "model", 768, "RETRIEVAL_DOCUMENT")
+
+
+def test_client_embeds_only_misses_and_skips_zero_vectors(tmp_path):
+    client = EmbeddingClient(RAGConfig(embed_cache_dir=str(tmp_path), embedding_dim=2))
+    calls = []
+
+    async def embed(texts):
+        calls.append(list(texts))
+        return [[0.0, 0.0] if t == "failed" else [float(len(t)), 1.0] for t in texts]
+
+    def run(texts):
+        return asyncio.run(client._embed_through_cache(texts, "RETRIEVAL_DOCUMENT", embed))
+
+    assert run(["a", "bb", "failed"]) == [[1.0, 1.0], [2.0, 1.0], [0.0, 0.0]]
+    assert run(["bb", "ccc", "failed"]) == [[2.0, 1.0], [3.0, 1.0], [0.0, 0.0]]
+    # The zero-vector fallback is retried, not served from the cache
+    assert calls == [["a", "bb", "failed"], ["ccc", "failed"]]
+
+
+def test_least_recently_used_entries_are_pruned(tmp_path, monkeypatch):
+    monkeypatch.setattr(EmbeddingCache, "_PRUNE_EVERY", 1)
+    clock = [1000.0]
+    monkeypatch.setattr("project_tools._embedding_cache.time.time", lambda: clock[0])
+    cache = EmbeddingCache(str(tmp_path), max_entries=2)
+
+    for key in ("a", "b"):
+        clock[0] += 1
+        cache.set_many([(key, [1.0])])
+    # Reading "a" makes "b" the least recently used entry
+    clock[0] += 1
+    cache.get_many(["a"])
+    clock[0] += 1
+    cache.set_many([("c", [1.0])])
+
+    assert set(cache.get_many(["a", "b", "c"])) == {"a", "c"}
+
+
+def test_cache_without_last_used_column_is_migrated(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "embeddings.sqlite3"))
+    conn.execute("CREATE TABLE embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+    conn.execute("INSERT INTO embeddings VALUES (?, ?)", ("old", array("f", [2.0]).tobytes()))
+    conn.commit()
+    conn.close()
+
+    cache = EmbeddingCache(str(tmp_path))
+    assert cache.get_many(["old"]) == {"old": [2.0]}
+    cache.set_many([("new", [3.0])])
+    assert cache.get_many(["new"]) == {"new": [3.0]}
@@ -0,0 +1,77 @@
+"""
+Tests for the query embedding batcher in vector_search_tool
+"""
+
+import asyncio
+
+import pytest
+
+from project_tools.vector_search_tool import _QueryBatcher
+
+
+class FakeEmbeddingClient:
+    def __init__(self, drop=0, error=None):
+        self.batches = []
+        self.drop = drop
+        self.error = error
+
+    async def aembed_queries(self, queries):
+        self.batches.append(list(queries))
+        if self.error is not None:
+            raise self.error
+        embeddings = [[float(len(q))] for q in queries]
+        return embeddings[:len(embeddings) - self.drop]
+
+
+async def submit_all(batcher, queries):
+    # Bounded so an unresolved future fails the test instead of hanging it
+    return await asyncio.wait_for(
+        asyncio.gather(*(batcher.submit(q) for q in queries), return_exceptions=True),
+        timeout=5
+    )
+
+
+def test_concurrent_queries_share_one_call():
+    client = FakeEmbeddingClient()
+    batcher = _QueryBatcher(client)
+
+    results = asyncio.run(submit_all(batcher, ["a", "bb", "ccc"]))
+
+    assert results == [[1.0], [2.0], [3.0]]
+    assert client.batches == [["a", "bb", "ccc"]]
+
+
+def test_lone_query_skips_the_batching_window():
+    batcher = _QueryBatcher(FakeEmbeddingClient(), max_wait=10)
+
+    # Would time out if the single query waited out max_wait
+    assert asyncio.run(submit_all(batcher, ["a"])) == [[1.0]]
+
+
+def test_short_embedding_list_fails_every_waiter():
+    batcher = _QueryBatcher(FakeEmbeddingClient(drop=1))
+
+    results = asyncio.run(submit_all(batcher, ["a", "bb", "ccc"]))
+
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+def test_client_error_fails_every_waiter():
+    error = RuntimeError("embedding service down")
+    batcher = _QueryBatcher(FakeEmbeddingClient(error=error))
+
+    results = asyncio.run(submit_all(batcher, ["a", "bb"]))
+
+    assert results == [error, error]
+
+
+def test_failed_batch_releases_its_slot():
+    client = FakeEmbeddingClient(error=RuntimeError("boom"))
+    batcher = _QueryBatcher(client, max_in_flight=1)
+
+    async def main():
+        await submit_all(batcher, ["a"])
+        client.error = None
+        return await submit_all(batcher, ["b"])
+
+    assert asyncio.run(main()) == [[1.0]]
@@ -0,0 +1,90 @@
+"""
+Tests for the indexed-files cache in VectorDBClient
+"""
+
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from qdrant_client.models import PointStruct
+
+from project_tools import _vector_db_client
+from project_tools._rag_config import RAGConfig
+from project_tools._vector_db_client import VectorDBClient, _CACHE_TTL_SECONDS
+
+COLLECTION = "cache_test"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(_vector_db_client, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+@pytest.fixture
+def client():
+    db = VectorDBClient(RAGConfig(vector_db_type="memory", embedding_dim=4))
+    asyncio.run(db.upsert_vectors(
+        [[0.1, 0.2, 0.3, 0.4]], ["doc"], [{"source": "a.md"}], COLLECTION
+    ))
+    scans = []
+    scroll_sources = db._scroll_sources
+
+    async def counting_scroll(*args, **kwargs):
+        scans.append(1)
+        return await scroll_sources(*args, **kwargs)
+
+    db._scroll_sources = counting_scroll
+    db.scans = scans
+    return db
+
+
+def external_write(db, source):
+    """Write behind the client's back, as another process would"""
+    db._get_client().upsert(
+        collection_name=COLLECTION,
+        points=[PointStruct(id=str(uuid.uuid4()), vector=[0.4, 0.3, 0.2, 0.1],
+                            payload={"source": source, "document": "doc"})],
+        wait=True
+    )
+
+
+def test_cache_reused_within_ttl(client, clock):
+    assert asyncio.run(client.get_indexed_files(COLLECTION)) == ["a.md"]
+    clock[0] += _CACHE_TTL_SECONDS / 2
+    assert asyncio.run(client.get_indexed_files(COLLECTION)) == ["a.md"]
+    assert len(client.scans) == 1
+
+
+def test_count_change_invalidates_within_ttl(client, clock):
+    asyncio.run(client.get_indexed_files(COLLECTION))
+    external_write(client, "b.md")
+    clock[0] += 1
+    assert sorted(asyncio.run(client.get_indexed_files(COLLECTION))) == ["a.md", "b.md"]
+    assert len(client.scans) == 2
+
+
+def test_ttl_is_a_hard_upper_bound(client, clock):
+    asyncio.run(client.get_indexed_files(COLLECTION))
+    # Unchanged count must not keep the entry alive past the TTL
+    clock[0] += _CACHE_TTL_SECONDS + 1
+    asyncio.run(client.get_indexed_files(COLLECTION))
+    assert len(client.scans) == 2
+    assert client._indexed_files_cache[COLLECTION][0] == clock[0]
+
+
+def test_local_write_drops_cache(client, clock):
+    asyncio.run(client.get_indexed_files(COLLECTION))
+    asyncio.run(client.upsert_vectors(
+        [[0.1, 0.1, 0.1, 0.1]], ["doc"], [{"source": "c.md"}], COLLECTION
+    ))
+    assert sorted(asyncio.run(client.get_indexed_files(COLLECTION))) == ["a.md", "c.md"]
+
+
+def test_cached_collection_list_is_not_shared_with_callers(client, clock):
+    first = asyncio.run(client.list_collections())
+    first[0]["name"] = "mutated"
+    first.append({"name": "extra"})
+    assert [c["name"] for c in asyncio.run(client.list_collections())] == [COLLECTION]